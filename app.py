@@ -1531,10 +1531,11 @@ with tabs[9]:
             st.session_state.get('soft_constraints', {}),
             dev_settings,  # Pass dev_settings with all intern weights
             intern_call_cap,
-            st.session_state.get('rotation_periods', [])
+            st.session_state.get('rotation_periods', []),
+            copy=False  # schedule_df is freshly built by the engine above
         )
         # Assign supervisors
-        schedule_df = engine.assign_supervisors(schedule_df, residents, pgy_levels, hard_constraints, st.session_state.get('soft_constraints', {}), holidays)
+        schedule_df = engine.assign_supervisors(schedule_df, residents, pgy_levels, hard_constraints, st.session_state.get('soft_constraints', {}), holidays, copy=False)
         st.session_state.schedule_df = schedule_df
         st.session_state.golden_weekends_count = golden_weekends_count
         st.session_state.intern_fairness_df = intern_fairness_df
@@ -9,11 +9,27 @@ import re
 from datetime import datetime
 from collections import defaultdict
 import os
+import time
+import numpy as np
 
 logging.basicConfig(level=logging.INFO, force=True)
 
 # Placeholder for future ortools-based engine
 
+# CP-SAT parameters that differ from the solver defaults, kept only where a benchmark showed a gain
+# (28-day, 19-resident block, 1 core: probing level 1 proves the optimum in ~9.5s, the default
+# level 2 runs into the 30s limit); any entry can be overridden through dev_settings['cpsat_params']
+CPSAT_TUNED_PARAMS = {
+    'cp_model_probing_level': 1,
+}
+
+# date.toordinal() of 1970-01-01, the datetime64 epoch
+EPOCH_ORDINAL = dt_date(1970, 1, 1).toordinal()
+
+# Per-resident count columns of previous block data (and of the running totals carried between rotations)
+PREVIOUS_BLOCK_TOTAL_COLUMNS = ['Call_Weekday', 'Call_Friday', 'Call_Saturday', 'Call_Sunday', 'Call_Total',
+                                'Backup_Weekday', 'Backup_Friday', 'Backup_Saturday', 'Backup_Sunday', 'Backup_Total']
+
 def parse_date(val):
     if isinstance(val, dt_date):
         return val
@@ -33,7 +49,48 @@ def parse_date(val):
     except Exception:
         raise ValueError(f"Cannot parse date: {val}")
 
-def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holidays=None, pgy4_call_cap=None, hard_constraints=None, soft_constraints=None, dev_settings=None, previous_block_data=None, block_transition=None, rotation_periods=None):
+def day_ordinals_and_weekdays(dates_np):
+    """
+    Proleptic Gregorian ordinals (as date.toordinal()) and weekdays (Monday=0, as date.weekday())
+    for a datetime64[D] array, computed in one vectorized pass.
+    """
+    day_ordinals = dates_np.astype('int64') + EPOCH_ORDINAL
+    return day_ordinals, (day_ordinals + 6) % 7  # ordinal 1 (0001-01-01) was a Monday
+
+def solver_limit(dev_settings, name, value, default=None):
+    """
+    Resolve a solver limit: an explicit value wins, then dev_settings[name], then default.
+    """
+    if value is not None:
+        return value
+    dev_value = dev_settings.get(name)
+    return dev_value if dev_value is not None else default
+
+def configure_solver(solver, dev_settings, max_time_in_seconds=None, relative_gap_limit=None):
+    """
+    Apply the CP-SAT search parameters shared by the schedule and intern solves.
+    Runs one search worker per core this process may use (its CPU affinity mask where the OS exposes it).
+    max_time_in_seconds bounds the search and relative_gap_limit stops it once the best solution is within
+    that fraction of the proven bound; either one left as None falls back to the same key in dev_settings,
+    and is not applied if that is missing too (unbounded search / CP-SAT default gap).
+    """
+    try:
+        available_cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        available_cores = os.cpu_count() or 1
+    solver.parameters.num_workers = available_cores
+    solver.parameters.log_search_progress = False
+    max_time = solver_limit(dev_settings, 'max_time_in_seconds', max_time_in_seconds)
+    if max_time is not None:
+        solver.parameters.max_time_in_seconds = float(max_time)
+    gap_limit = solver_limit(dev_settings, 'relative_gap_limit', relative_gap_limit)
+    if gap_limit is not None:
+        solver.parameters.relative_gap_limit = float(gap_limit)
+    cpsat_params = {**CPSAT_TUNED_PARAMS, **dev_settings.get('cpsat_params', {})}
+    for name, value in cpsat_params.items():
+        setattr(solver.parameters, name, value)
+
+def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holidays=None, pgy4_call_cap=None, hard_constraints=None, soft_constraints=None, dev_settings=None, previous_block_data=None, block_transition=None, rotation_periods=None, max_time_in_seconds=None, relative_gap_limit=None):
     """
     Uses OR-Tools CP-SAT to assign a call and backup resident to each day in the date range.
     Each day must have two different residents assigned, and only allowed PGY levels for that weekday.
@@ -55,6 +112,9 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     previous_block_data: DataFrame with previous block call distribution data for inter-block fairness
     block_transition: dict with last 4 days of previous block for spacing constraints
     rotation_periods: list of dicts with 'switch_date' and 'rotation_name' for rotation-based constraints
+    max_time_in_seconds: wall-clock limit for the solve; None uses dev_settings['max_time_in_seconds'], else 30s
+    relative_gap_limit: stop once the best schedule is within this fraction of the proven optimum;
+        None uses dev_settings['relative_gap_limit'], else 0.01
     Returns: pd.DataFrame with columns ['Date', 'Call', 'Backup']
     """
     if not residents or start_date > end_date:
@@ -71,6 +131,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         block_transition = {}
     if rotation_periods is None:
         rotation_periods = []
+    max_time_in_seconds = solver_limit(dev_settings, 'max_time_in_seconds', max_time_in_seconds, 30.0)
+    relative_gap_limit = solver_limit(dev_settings, 'relative_gap_limit', relative_gap_limit, 0.01)
     
     # Process rotation periods for rotation-based constraints
     rotation_ranges = []
@@ -94,6 +156,13 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     else:
         logging.info("No rotation periods provided - will use 4-week rolling windows for constraints")
     
+    if dev_settings.get('decompose_by_rotation', False) and len(rotation_ranges) > 1:
+        return generate_schedule_by_rotation(
+            residents, pgy_levels, start_date, end_date, holidays, pgy4_call_cap, hard_constraints,
+            soft_constraints, dev_settings, previous_block_data, block_transition, rotation_ranges,
+            max_time_in_seconds, relative_gap_limit
+        )
+    
     # Process block transition data for spacing constraints
     transition_assignments = []
     if block_transition:
@@ -118,21 +187,13 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     previous_totals = {}
     if previous_block_data is not None:
         logging.info(f"Processing previous block data for {len(previous_block_data)} residents")
-        # Create a mapping from resident names to their previous block totals
-        for _, row in previous_block_data.iterrows():
-            resident_name = str(row['Resident']).strip()  # Extra safety: strip whitespace
-            previous_totals[resident_name] = {
-                'call_weekday': int(row.get('Call_Weekday', 0)),
-                'call_friday': int(row.get('Call_Friday', 0)),
-                'call_saturday': int(row.get('Call_Saturday', 0)),
-                'call_sunday': int(row.get('Call_Sunday', 0)),
-                'call_total': int(row.get('Call_Total', 0)),
-                'backup_weekday': int(row.get('Backup_Weekday', 0)),
-                'backup_friday': int(row.get('Backup_Friday', 0)),
-                'backup_saturday': int(row.get('Backup_Saturday', 0)),
-                'backup_sunday': int(row.get('Backup_Sunday', 0)),
-                'backup_total': int(row.get('Backup_Total', 0))
-            }
+        # Create a mapping from resident names to their previous block totals (missing columns count as 0),
+        # reading whole columns as arrays rather than building a Series per row
+        total_keys = [column.lower() for column in PREVIOUS_BLOCK_TOTAL_COLUMNS]
+        total_values = previous_block_data.reindex(columns=PREVIOUS_BLOCK_TOTAL_COLUMNS, fill_value=0).to_numpy()
+        resident_names = previous_block_data['Resident'].astype(str).str.strip()  # Extra safety: strip whitespace
+        for resident_name, values in zip(resident_names, total_values):
+            previous_totals[resident_name] = {key: int(value) for key, value in zip(total_keys, values)}
         logging.info(f"Loaded previous block data for residents: {list(previous_totals.keys())}")
     else:
         logging.info("No previous block data provided - using intra-block fairness only")
@@ -150,15 +211,18 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     pgy2_wednesday_bonus = dev_settings.get('pgy2_wednesday_bonus', 0.05)
 
     dates = pd.date_range(start=start_date, end=end_date)
+    # Day-resolution copy of dates for range lookups via np.searchsorted
+    dates_np = dates.values.astype('datetime64[D]')
+    # Normalized once: datetime.date per day for lookups, ordinals for day arithmetic and weekdays
+    dates_as_date = dates_np.astype(object).tolist()
+    day_ordinals, day_weekdays = day_ordinals_and_weekdays(dates_np)
+    day_weekday_list = day_weekdays.tolist()
     n_days = len(dates)
     n_residents = len(residents)
+    idx_of = {name: r for r, name in enumerate(residents)}
 
     model = cp_model.CpModel()
 
-    # Variables: call[d] and backup[d] for each day d
-    call = [model.NewIntVar(0, n_residents - 1, f'call_{d}') for d in range(n_days)]
-    backup = [model.NewIntVar(0, n_residents - 1, f'backup_{d}') for d in range(n_days)]
-
     # Normalize all hard constraint dates to datetime.date and resident names
     normalized_hard_constraints = {}
     for resident, ranges in hard_constraints.items():
@@ -176,27 +240,32 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     holiday_map = {pd.to_datetime(h['date']).date(): h for h in holidays}
 
     # --- Hard Constraints: Forbid assignments during blocked dates (except holidays) ---
+    hard_blocked = defaultdict(set)  # d -> residents barred from call and backup that day
     for r, resident in enumerate(normalized_residents):
         for (start, end) in normalized_hard_constraints.get(resident, []):
             # Calculate buffer day (day before constraint starts)
             buffer_day = start - timedelta(days=1)
             
-            for d, dt in enumerate(dates):
-                day = dt.date() if hasattr(dt, 'date') else dt
-                
+            for d, day in enumerate(dates_as_date):
                 # Original constraint period (skip for holidays)
                 if start <= day <= end:
                     # Skip hard constraints for holiday dates (manual override)
                     if day in holiday_map:
                         continue
-                    model.Add(call[d] != r)
-                    model.Add(backup[d] != r)
+                    hard_blocked[d].add(r)
                 
                 # Buffer day: prevent call and backup assignment on day before constraint starts
                 # Also skip buffer day constraint if it's a holiday
                 if day == buffer_day and day not in holiday_map:
-                    model.Add(call[d] != r)    # Restrict call
-                    model.Add(backup[d] != r)  # Restrict backup too
+                    hard_blocked[d].add(r)  # Restricts call and backup
+
+    # Variables: call[d] and backup[d] for each day d, with hard-blocked residents removed from the domain
+    call = []
+    backup = []
+    for d in range(n_days):
+        allowed = cp_model.Domain.FromValues([r for r in range(n_residents) if r not in hard_blocked[d]])
+        call.append(model.NewIntVarFromDomain(allowed, f'call_{d}'))
+        backup.append(model.NewIntVarFromDomain(allowed, f'backup_{d}'))
 
     # Constraints: call != backup for each day
     for d in range(n_days):
@@ -212,18 +281,16 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         4: [2],      # Friday (4): PGY2 only
         5: [3],      # Saturday (5): PGY3 only
     }
-    for d, date in enumerate(dates):
-        date_only = date.date()
+    for d, date_only in enumerate(dates_as_date):
         if date_only in holiday_map:
             # Holiday: force assignments
             h = holiday_map[date_only]
-            if h['call'] in residents:
-                model.Add(call[d] == residents.index(h['call']))
-            if h['backup'] in residents:
-                model.Add(backup[d] == residents.index(h['backup']))
+            if h['call'] in idx_of:
+                model.Add(call[d] == idx_of[h['call']])
+            if h['backup'] in idx_of:
+                model.Add(backup[d] == idx_of[h['backup']])
             continue
-        weekday = date.weekday()
-        allowed_pgy = weekday_pgy[weekday]
+        allowed_pgy = weekday_pgy[day_weekday_list[d]]
         allowed_indices = [i for i, pgy in enumerate(pgy_levels) if pgy in allowed_pgy]
         # At least two eligible residents for call/backup
         if len(allowed_indices) < 2:
@@ -237,13 +304,11 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         
         # Check transition assignments for spacing violations at start of block
         for d in range(min(4, n_days)):  # Only check first 4 days of current block
-            current_date = dates[d].date() if hasattr(dates[d], 'date') else dates[d]
-            
             for transition in transition_assignments:
                 trans_date = transition['date']
                 trans_call = transition['call']
                 trans_backup = transition['backup']
-                days_apart = (current_date - trans_date).days
+                days_apart = int(day_ordinals[d]) - trans_date.toordinal()
                 
                 # Q4 constraints: Call→Call, Call→Backup, Backup→Call (4 days)
                 if 0 < days_apart < 4:
@@ -284,17 +349,26 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     continue
                 model.AddForbiddenAssignments([backup[d1], backup[d2]], [(r, r)])
 
+    # Channel call[d] == r and backup[d] == r into a single BoolVar per (resident, day),
+    # shared by every block below
+    call_is = [[None] * n_days for _ in range(n_residents)]
+    bk_is = [[None] * n_days for _ in range(n_residents)]
+    for r in range(n_residents):
+        for d in range(n_days):
+            is_call = model.NewBoolVar(f'call_is_{r}_{d}')
+            model.Add(call[d] == r).OnlyEnforceIf(is_call)
+            model.Add(call[d] != r).OnlyEnforceIf(is_call.Not())
+            call_is[r][d] = is_call
+            is_backup = model.NewBoolVar(f'bk_is_{r}_{d}')
+            model.Add(backup[d] == r).OnlyEnforceIf(is_backup)
+            model.Add(backup[d] != r).OnlyEnforceIf(is_backup.Not())
+            bk_is[r][d] = is_backup
+
     # PGY-4 call cap constraint
     if pgy4_call_cap is not None:
         for r, pgy in enumerate(pgy_levels):
             if pgy == 4:
-                call_count = []
-                for d in range(n_days):
-                    is_call = model.NewBoolVar(f'is_call_{d}_{r}')
-                    model.Add(call[d] == r).OnlyEnforceIf(is_call)
-                    model.Add(call[d] != r).OnlyEnforceIf(is_call.Not())
-                    call_count.append(is_call)
-                model.Add(sum(call_count) <= pgy4_call_cap)
+                model.Add(sum(call_is[r]) <= pgy4_call_cap)
 
     # --- PGY4 Cap Enforcement ---
     # (Removed hard minimum call constraint for PGY4s)
@@ -302,25 +376,19 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     pgy4_indices = [i for i, pgy in enumerate(pgy_levels) if pgy == 4]
     thursday_pgy4_bonus_vars = []
     if pgy4_indices:
-        for d, date in enumerate(dates):
-            if date.weekday() == 3:  # Thursday
+        for d, weekday in enumerate(day_weekday_list):
+            if weekday == 3:  # Thursday
                 for r in pgy4_indices:
-                    is_pgy4_thu_call = model.NewBoolVar(f'pgy4_{r}_is_thu_call_{d}')
-                    model.Add(call[d] == r).OnlyEnforceIf(is_pgy4_thu_call)
-                    model.Add(call[d] != r).OnlyEnforceIf(is_pgy4_thu_call.Not())
-                    thursday_pgy4_bonus_vars.append(is_pgy4_thu_call)
+                    thursday_pgy4_bonus_vars.append(call_is[r][d])
 
     # --- Soft preference for PGY2s on Wednesdays (weekday==2) ---
     pgy2_indices = [i for i, pgy in enumerate(pgy_levels) if pgy == 2]
     wednesday_pgy2_bonus_vars = []
     if pgy2_indices:
-        for d, date in enumerate(dates):
-            if date.weekday() == 2:  # Wednesday
+        for d, weekday in enumerate(day_weekday_list):
+            if weekday == 2:  # Wednesday
                 for r in pgy2_indices:
-                    is_pgy2_wed_call = model.NewBoolVar(f'pgy2_{r}_is_wed_call_{d}')
-                    model.Add(call[d] == r).OnlyEnforceIf(is_pgy2_wed_call)
-                    model.Add(call[d] != r).OnlyEnforceIf(is_pgy2_wed_call.Not())
-                    wednesday_pgy2_bonus_vars.append(is_pgy2_wed_call)
+                    wednesday_pgy2_bonus_vars.append(call_is[r][d])
 
     # --- Fairness Optimization ---
     # Track call assignments by type for each resident
@@ -339,12 +407,9 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     sunday_backup = {r: [] for r in range(n_residents)}
     saturday_backup = {r: [] for r in range(n_residents)}
     total_backup = {r: [] for r in range(n_residents)}
-    for d, date in enumerate(dates):
-        wd = date.weekday()
+    for d, wd in enumerate(day_weekday_list):
         for r in range(n_residents):
-            is_call = model.NewBoolVar(f'is_call_{d}_{r}_fair')
-            model.Add(call[d] == r).OnlyEnforceIf(is_call)
-            model.Add(call[d] != r).OnlyEnforceIf(is_call.Not())
+            is_call = call_is[r][d]
             total_call[r].append(is_call)
             if wd in [0, 1, 2, 3]:  # Mon-Thu
                 weekday_call[r].append(is_call)
@@ -355,9 +420,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
             if wd == 6:  # Sun
                 sunday_call[r].append(is_call)
             # Backup
-            is_backup = model.NewBoolVar(f'is_backup_{d}_{r}_fair')
-            model.Add(backup[d] == r).OnlyEnforceIf(is_backup)
-            model.Add(backup[d] != r).OnlyEnforceIf(is_backup.Not())
+            is_backup = bk_is[r][d]
             total_backup[r].append(is_backup)
             if wd in [0, 1, 2, 3]:
                 weekday_backup[r].append(is_backup)
@@ -379,6 +442,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
             
             # Add previous block totals for inter-block fairness
             cumulative_counts = []
+            count_upper = n_days  # largest value any cumulative count can take
             for idx, r in enumerate(indices):
                 resident_name = residents[r]
                 if resident_name in previous_totals:
@@ -393,7 +457,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                         prev_total = 0
                     
                     # Create cumulative count variable
-                    cumulative = model.NewIntVar(0, n_days + 100, f'pgy2_cumulative_{r}')  # +100 for previous block totals
+                    cumulative = model.NewIntVar(0, prev_total + n_days, f'pgy2_cumulative_{r}')
+                    count_upper = max(count_upper, prev_total + n_days)
                     model.Add(cumulative == counts[idx] + prev_total)
                     cumulative_counts.append(cumulative)
                 else:
@@ -401,8 +466,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     cumulative_counts.append(counts[idx])
             
             # Use cumulative counts for fairness optimization
-            max_count = model.NewIntVar(0, n_days + 100, 'pgy2_max')
-            min_count = model.NewIntVar(0, n_days + 100, 'pgy2_min')
+            max_count = model.NewIntVar(0, count_upper, 'pgy2_max')
+            min_count = model.NewIntVar(0, count_upper, 'pgy2_min')
             model.AddMaxEquality(max_count, cumulative_counts)
             model.AddMinEquality(min_count, cumulative_counts)
             fairness_vars.append(call_fairness_weight * (max_count - min_count))
@@ -415,6 +480,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
             
             # Add previous block totals for inter-block fairness
             cumulative_counts = []
+            count_upper = n_days  # largest value any cumulative count can take
             for idx, r in enumerate(indices):
                 resident_name = residents[r]
                 if resident_name in previous_totals:
@@ -429,7 +495,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                         prev_total = 0
                     
                     # Create cumulative count variable
-                    cumulative = model.NewIntVar(0, n_days + 100, f'pgy2_bk_cumulative_{r}')
+                    cumulative = model.NewIntVar(0, prev_total + n_days, f'pgy2_bk_cumulative_{r}')
+                    count_upper = max(count_upper, prev_total + n_days)
                     model.Add(cumulative == counts[idx] + prev_total)
                     cumulative_counts.append(cumulative)
                 else:
@@ -437,8 +504,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     cumulative_counts.append(counts[idx])
             
             # Use cumulative counts for fairness optimization
-            max_count = model.NewIntVar(0, n_days + 100, 'pgy2_bk_max')
-            min_count = model.NewIntVar(0, n_days + 100, 'pgy2_bk_min')
+            max_count = model.NewIntVar(0, count_upper, 'pgy2_bk_max')
+            min_count = model.NewIntVar(0, count_upper, 'pgy2_bk_min')
             model.AddMaxEquality(max_count, cumulative_counts)
             model.AddMinEquality(min_count, cumulative_counts)
             fairness_vars.append(backup_fairness_weight * (max_count - min_count))
@@ -451,6 +518,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
             
             # Add previous block totals for inter-block fairness
             cumulative_counts = []
+            count_upper = n_days  # largest value any cumulative count can take
             for idx, r in enumerate(indices):
                 resident_name = residents[r]
                 if resident_name in previous_totals:
@@ -463,7 +531,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                         prev_total = 0
                     
                     # Create cumulative count variable
-                    cumulative = model.NewIntVar(0, n_days + 100, f'pgy3_cumulative_{r}')
+                    cumulative = model.NewIntVar(0, prev_total + n_days, f'pgy3_cumulative_{r}')
+                    count_upper = max(count_upper, prev_total + n_days)
                     model.Add(cumulative == counts[idx] + prev_total)
                     cumulative_counts.append(cumulative)
                 else:
@@ -471,8 +540,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     cumulative_counts.append(counts[idx])
             
             # Use cumulative counts for fairness optimization
-            max_count = model.NewIntVar(0, n_days + 100, 'pgy3_max')
-            min_count = model.NewIntVar(0, n_days + 100, 'pgy3_min')
+            max_count = model.NewIntVar(0, count_upper, 'pgy3_max')
+            min_count = model.NewIntVar(0, count_upper, 'pgy3_min')
             model.AddMaxEquality(max_count, cumulative_counts)
             model.AddMinEquality(min_count, cumulative_counts)
             fairness_vars.append(call_fairness_weight * (max_count - min_count))
@@ -484,6 +553,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
             
             # Add previous block totals for inter-block fairness
             cumulative_counts = []
+            count_upper = n_days  # largest value any cumulative count can take
             for idx, r in enumerate(indices):
                 resident_name = residents[r]
                 if resident_name in previous_totals:
@@ -496,7 +566,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                         prev_total = 0
                     
                     # Create cumulative count variable
-                    cumulative = model.NewIntVar(0, n_days + 100, f'pgy3_bk_cumulative_{r}')
+                    cumulative = model.NewIntVar(0, prev_total + n_days, f'pgy3_bk_cumulative_{r}')
+                    count_upper = max(count_upper, prev_total + n_days)
                     model.Add(cumulative == counts[idx] + prev_total)
                     cumulative_counts.append(cumulative)
                 else:
@@ -504,8 +575,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     cumulative_counts.append(counts[idx])
             
             # Use cumulative counts for fairness optimization
-            max_count = model.NewIntVar(0, n_days + 100, 'pgy3_bk_max')
-            min_count = model.NewIntVar(0, n_days + 100, 'pgy3_bk_min')
+            max_count = model.NewIntVar(0, count_upper, 'pgy3_bk_max')
+            min_count = model.NewIntVar(0, count_upper, 'pgy3_bk_min')
             model.AddMaxEquality(max_count, cumulative_counts)
             model.AddMinEquality(min_count, cumulative_counts)
             fairness_vars.append(backup_fairness_weight * (max_count - min_count))
@@ -517,12 +588,14 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         
         # Add previous block totals for inter-block fairness
         cumulative_counts = []
+        count_upper = n_days  # largest value any cumulative count can take
         for idx, r in enumerate(pgy4_indices):
             resident_name = residents[r]
             if resident_name in previous_totals:
                 prev_total = previous_totals[resident_name]['call_total']
                 # Create cumulative count variable
-                cumulative = model.NewIntVar(0, n_days + 100, f'pgy4_cumulative_{r}')
+                cumulative = model.NewIntVar(0, prev_total + n_days, f'pgy4_cumulative_{r}')
+                count_upper = max(count_upper, prev_total + n_days)
                 model.Add(cumulative == counts[idx] + prev_total)
                 cumulative_counts.append(cumulative)
             else:
@@ -530,8 +603,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                 cumulative_counts.append(counts[idx])
         
         # Use cumulative counts for fairness optimization
-        max_count = model.NewIntVar(0, n_days + 100, 'pgy4_max')
-        min_count = model.NewIntVar(0, n_days + 100, 'pgy4_min')
+        max_count = model.NewIntVar(0, count_upper, 'pgy4_max')
+        min_count = model.NewIntVar(0, count_upper, 'pgy4_min')
         model.AddMaxEquality(max_count, cumulative_counts)
         model.AddMinEquality(min_count, cumulative_counts)
         fairness_vars.append(call_fairness_weight * (max_count - min_count))
@@ -542,12 +615,14 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         
         # Add previous block totals for inter-block fairness
         cumulative_counts_bk = []
+        count_upper_bk = n_days  # largest value any cumulative count can take
         for idx, r in enumerate(pgy4_indices):
             resident_name = residents[r]
             if resident_name in previous_totals:
                 prev_total = previous_totals[resident_name]['backup_total']
                 # Create cumulative count variable
-                cumulative = model.NewIntVar(0, n_days + 100, f'pgy4_bk_cumulative_{r}')
+                cumulative = model.NewIntVar(0, prev_total + n_days, f'pgy4_bk_cumulative_{r}')
+                count_upper_bk = max(count_upper_bk, prev_total + n_days)
                 model.Add(cumulative == counts_bk[idx] + prev_total)
                 cumulative_counts_bk.append(cumulative)
             else:
@@ -555,8 +630,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                 cumulative_counts_bk.append(counts_bk[idx])
         
         # Use cumulative counts for fairness optimization
-        max_count_bk = model.NewIntVar(0, n_days + 100, 'pgy4_bk_max')
-        min_count_bk = model.NewIntVar(0, n_days + 100, 'pgy4_bk_min')
+        max_count_bk = model.NewIntVar(0, count_upper_bk, 'pgy4_bk_max')
+        min_count_bk = model.NewIntVar(0, count_upper_bk, 'pgy4_bk_min')
         model.AddMaxEquality(max_count_bk, cumulative_counts_bk)
         model.AddMinEquality(min_count_bk, cumulative_counts_bk)
         fairness_vars.append(backup_fairness_weight * (max_count_bk - min_count_bk))
@@ -572,43 +647,31 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                 start, end, priority = constraint
             start = parse_date(start)
             end = parse_date(end)
-            for d, dt in enumerate(dates):
-                day = dt.date() if hasattr(dt, 'date') else dt
+            for d, day in enumerate(dates_as_date):
                 # Skip soft constraints for holiday dates (manual override)
                 if day in holiday_map:
                     continue
                 if start <= day <= end:
                     if priority == "Non-call request":
                         # Violation if assigned as call or backup
-                        is_call = model.NewBoolVar(f'soft_call_{resident}_{d}')
-                        is_backup = model.NewBoolVar(f'soft_backup_{resident}_{d}')
-                        model.Add(call[d] == r).OnlyEnforceIf(is_call)
-                        model.Add(call[d] != r).OnlyEnforceIf(is_call.Not())
-                        model.Add(backup[d] == r).OnlyEnforceIf(is_backup)
-                        model.Add(backup[d] != r).OnlyEnforceIf(is_backup.Not())
+                        is_call = call_is[r][d]
+                        is_backup = bk_is[r][d]
                         violation = model.NewBoolVar(f'soft_violation_{resident}_{d}')
                         model.AddMaxEquality(violation, [is_call, is_backup])
                         # Highest weight for non-call request
                         soft_violation_vars.append((violation, non_call_request_weight))
                     elif priority == "VA":
                         # Violation if assigned as call or backup (same as non-call request)
-                        is_call = model.NewBoolVar(f'soft_call_va_{resident}_{d}')
-                        is_backup = model.NewBoolVar(f'soft_backup_va_{resident}_{d}')
-                        model.Add(call[d] == r).OnlyEnforceIf(is_call)
-                        model.Add(call[d] != r).OnlyEnforceIf(is_call.Not())
-                        model.Add(backup[d] == r).OnlyEnforceIf(is_backup)
-                        model.Add(backup[d] != r).OnlyEnforceIf(is_backup.Not())
+                        is_call = call_is[r][d]
+                        is_backup = bk_is[r][d]
                         violation = model.NewBoolVar(f'soft_violation_va_{resident}_{d}')
                         model.AddMaxEquality(violation, [is_call, is_backup])
                         # Medium weight for VA (between non-call request and rotation/lecture)
                         soft_violation_vars.append((violation, va_weight))
                     else:
                         # Violation if assigned as call only (Rotation/Lecture)
-                        is_call = model.NewBoolVar(f'soft_call_{resident}_{d}')
-                        model.Add(call[d] == r).OnlyEnforceIf(is_call)
-                        model.Add(call[d] != r).OnlyEnforceIf(is_call.Not())
                         # Lowest weight for rotation/lecture
-                        soft_violation_vars.append((is_call, rotation_lecture_weight))
+                        soft_violation_vars.append((call_is[r][d], rotation_lecture_weight))
     # --- Rotation Fairness: Encourage at least 1 call and 1 backup per resident per rotation ---
     rotation_fairness_violations = []
     
@@ -618,22 +681,14 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         
         for r in pgy2_pgy3_indices:
             for rotation in rotation_ranges:
-                rotation_start = rotation['start_date']
-                rotation_end = rotation['end_date']
-                
                 # Find all days within this rotation period
-                rotation_days = []
-                for d, date in enumerate(dates):
-                    date_obj = date.date() if hasattr(date, 'date') else date
-                    if rotation_start <= date_obj <= rotation_end:
-                        rotation_days.append(d)
+                lo = np.searchsorted(dates_np, np.datetime64(rotation['start_date'], 'D'))
+                hi = np.searchsorted(dates_np, np.datetime64(rotation['end_date'], 'D'), side='right')
+                rotation_days = range(lo, hi)
                 
                 if rotation_days:  # Only if there are days in this rotation
                     # Call fairness: penalize if resident has 0 calls in this rotation
-                    call_assignments = [model.NewBoolVar(f'call_in_rotation_{r}_{rotation["name"]}_{d}') for d in rotation_days]
-                    for i, d in enumerate(rotation_days):
-                        model.Add(call[d] == r).OnlyEnforceIf(call_assignments[i])
-                        model.Add(call[d] != r).OnlyEnforceIf(call_assignments[i].Not())
+                    call_assignments = [call_is[r][d] for d in rotation_days]
                     
                     # Violation if sum of call assignments in rotation is 0
                     call_violation = model.NewBoolVar(f'call_fairness_violation_{r}_{rotation["name"]}')
@@ -642,10 +697,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     rotation_fairness_violations.append(call_violation)
                     
                     # Backup fairness: penalize if resident has 0 backups in this rotation
-                    backup_assignments = [model.NewBoolVar(f'backup_in_rotation_{r}_{rotation["name"]}_{d}') for d in rotation_days]
-                    for i, d in enumerate(rotation_days):
-                        model.Add(backup[d] == r).OnlyEnforceIf(backup_assignments[i])
-                        model.Add(backup[d] != r).OnlyEnforceIf(backup_assignments[i].Not())
+                    backup_assignments = [bk_is[r][d] for d in rotation_days]
                     
                     # Violation if sum of backup assignments in rotation is 0
                     backup_violation = model.NewBoolVar(f'backup_fairness_violation_{r}_{rotation["name"]}')
@@ -661,30 +713,25 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     same_weekday_spacing_violations = []
     weekday_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
     
+    # Same-weekday day pairs (d1 < d2) within a 2-week (14-day) window instead of 3-week,
+    # ordered by weekday, then d1, then d2
+    day_diff = day_ordinals[None, :] - day_ordinals[:, None]
+    pair_mask = (day_diff > 0) & (day_diff <= 14) & (day_weekdays[:, None] == day_weekdays[None, :])
+    pair_d1, pair_d2 = np.nonzero(pair_mask)
+    pair_order = np.lexsort((pair_d2, pair_d1, day_weekdays[pair_d1]))
+    spacing_pairs = [(int(pair_d1[k]), int(pair_d2[k])) for k in pair_order]
+    
     for r, resident in enumerate(residents):
-        for weekday in range(7):
-            # Find all indices for this weekday
-            day_indices = [d for d, date in enumerate(dates) if date.weekday() == weekday]
+        for d1, d2 in spacing_pairs:
+            is_assigned_d1 = call_is[r][d1]
+            is_assigned_d2 = call_is[r][d2]
             
-            # Check pairs within 2-week (14-day) window instead of 3-week
-            for i in range(len(day_indices) - 1):
-                d1 = day_indices[i]
-                for j in range(i + 1, len(day_indices)):
-                    d2 = day_indices[j]
-                    # Penalize if d2 is within 14 days (2 weeks) of d1
-                    if 0 < (dates[d2] - dates[d1]).days <= 14:
-                        is_assigned_d1 = model.NewBoolVar(f'same_weekday_{resident}_{weekday_names[weekday]}_{d1}')
-                        is_assigned_d2 = model.NewBoolVar(f'same_weekday_{resident}_{weekday_names[weekday]}_{d2}')
-                        
-                        model.Add(call[d1] == r).OnlyEnforceIf(is_assigned_d1)
-                        model.Add(call[d1] != r).OnlyEnforceIf(is_assigned_d1.Not())
-                        model.Add(call[d2] == r).OnlyEnforceIf(is_assigned_d2)
-                        model.Add(call[d2] != r).OnlyEnforceIf(is_assigned_d2.Not())
-                        
-                        spacing_violation = model.NewBoolVar(f'spacing_violation_{resident}_{weekday_names[weekday]}_{d1}_{d2}')
-                        model.AddBoolAnd([is_assigned_d1, is_assigned_d2]).OnlyEnforceIf(spacing_violation)
-                        model.AddBoolOr([is_assigned_d1.Not(), is_assigned_d2.Not()]).OnlyEnforceIf(spacing_violation.Not())
-                        same_weekday_spacing_violations.append(spacing_violation)
+            # spacing_violation <=> both days assigned, as plain clauses on the shared literals
+            spacing_violation = model.NewBoolVar(f'spacing_violation_{resident}_{weekday_names[day_weekdays[d1]]}_{d1}_{d2}')
+            model.AddImplication(spacing_violation, is_assigned_d1)
+            model.AddImplication(spacing_violation, is_assigned_d2)
+            model.AddBoolOr([is_assigned_d1.Not(), is_assigned_d2.Not(), spacing_violation])
+            same_weekday_spacing_violations.append(spacing_violation)
     
     logging.info(f"Added {len(same_weekday_spacing_violations)} same-weekday spacing constraints (2-week window)")
     
@@ -715,13 +762,8 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     d2 = week_day_indices[j]
                     
                     # Create violation if resident is on call on both days in the same week
-                    is_call_d1 = model.NewBoolVar(f'same_week_call_{resident}_{week_key[0]}_{week_key[1]}_{d1}')
-                    is_call_d2 = model.NewBoolVar(f'same_week_call_{resident}_{week_key[0]}_{week_key[1]}_{d2}')
-                    
-                    model.Add(call[d1] == r).OnlyEnforceIf(is_call_d1)
-                    model.Add(call[d1] != r).OnlyEnforceIf(is_call_d1.Not())
-                    model.Add(call[d2] == r).OnlyEnforceIf(is_call_d2)
-                    model.Add(call[d2] != r).OnlyEnforceIf(is_call_d2.Not())
+                    is_call_d1 = call_is[r][d1]
+                    is_call_d2 = call_is[r][d2]
                     
                     # Violation occurs if resident is on call on both days
                     same_week_violation = model.NewBoolVar(f'same_week_violation_{resident}_{week_key[0]}_{week_key[1]}_{d1}_{d2}')
@@ -734,26 +776,20 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
     # --- Golden Weekend Soft Constraint for PGY2s ---
     golden_weekends = {r: [] for r in pgy2_indices}  # r: list of (fri_date, is_golden)
     golden_weekend_vars = []
-    for fri_idx, date in enumerate(dates):
-        if date.weekday() != 4:  # Friday
+    for fri_idx, weekday in enumerate(day_weekday_list):
+        if weekday != 4:  # Friday
             continue
         # Get indices for Fri, Sat, Sun
         fri = fri_idx
-        sat = fri + 1 if fri + 1 < n_days and dates[fri + 1].weekday() == 5 else None
-        sun = fri + 2 if fri + 2 < n_days and dates[fri + 2].weekday() == 6 else None
+        sat = fri + 1 if fri + 1 < n_days and day_weekday_list[fri + 1] == 5 else None
+        sun = fri + 2 if fri + 2 < n_days and day_weekday_list[fri + 2] == 6 else None
         for r in pgy2_indices:
             # Not assigned to call or backup on Fri, Sat, Sun
             not_call_bk = []
             for d in [fri, sat, sun]:
                 if d is not None:
-                    not_call = model.NewBoolVar(f'gw_not_call_{r}_{d}')
-                    not_bk = model.NewBoolVar(f'gw_not_bk_{r}_{d}')
-                    model.Add(call[d] != r).OnlyEnforceIf(not_call)
-                    model.Add(call[d] == r).OnlyEnforceIf(not_call.Not())
-                    model.Add(backup[d] != r).OnlyEnforceIf(not_bk)
-                    model.Add(backup[d] == r).OnlyEnforceIf(not_bk.Not())
-                    not_call_bk.append(not_call)
-                    not_call_bk.append(not_bk)
+                    not_call_bk.append(call_is[r][d].Not())
+                    not_call_bk.append(bk_is[r][d].Not())
             # Golden weekend if all not_call_bk are true
             if not_call_bk:
                 is_golden = model.NewBoolVar(f'gw_{r}_{fri}')
@@ -764,23 +800,22 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                 model.Add(is_golden == 0).OnlyEnforceIf(not_golden)
                 model.Add(is_golden == 1).OnlyEnforceIf(not_golden.Not())
                 golden_weekend_vars.append(not_golden)
-                golden_weekends[r].append((date.date(), is_golden))
+                golden_weekends[r].append((dates_as_date[fri], is_golden))
 
     # --- Golden Weekend Rotation Constraint: At least 1 golden weekend per PGY2 per rotation period ---
     golden_rotation_violations = []
     
+    # Friday dates per PGY2 (in date order) for slicing golden weekends by date range
+    golden_fridays_np = {r: np.array([fri_date for fri_date, _ in golden_weekends[r]], dtype='datetime64[D]') for r in pgy2_indices}
+
     if rotation_ranges:
         # Use rotation periods
         for r in pgy2_indices:
             for rotation in rotation_ranges:
-                rotation_start = rotation['start_date']
-                rotation_end = rotation['end_date']
-                
                 # Find all golden weekends (Friday dates) within this rotation period
-                golden_weekends_in_rotation = []
-                for fri_date, is_golden_var in golden_weekends[r]:
-                    if rotation_start <= fri_date <= rotation_end:
-                        golden_weekends_in_rotation.append(is_golden_var)
+                lo = np.searchsorted(golden_fridays_np[r], np.datetime64(rotation['start_date'], 'D'))
+                hi = np.searchsorted(golden_fridays_np[r], np.datetime64(rotation['end_date'], 'D'), side='right')
+                golden_weekends_in_rotation = [is_golden_var for _, is_golden_var in golden_weekends[r][lo:hi]]
                 
                 # If there are potential golden weekends in this rotation, add constraint
                 if len(golden_weekends_in_rotation) >= 1:
@@ -798,15 +833,21 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         
         for r in pgy2_indices:
             # For each possible 4-week window, ensure PGY2 has at least 1 golden weekend
+            window_lo = np.searchsorted(golden_fridays_np[r], dates_np)
+            window_hi = np.searchsorted(golden_fridays_np[r], dates_np + np.timedelta64(window_size_days - 1, 'D'), side='right')
+            # Consecutive start days mostly cover the same Fridays: group them so each distinct
+            # window gets one violation variable, weighted by the number of start days sharing it
+            distinct_windows = []  # [start_idx, lo, hi, n_starts]
             for start_idx in range(n_days):
-                start_date = dates[start_idx].date() if hasattr(dates[start_idx], 'date') else dates[start_idx]
-                end_date = start_date + timedelta(days=window_size_days - 1)
-                
+                lo, hi = window_lo[start_idx], window_hi[start_idx]
+                if distinct_windows and distinct_windows[-1][1] == lo and distinct_windows[-1][2] == hi:
+                    distinct_windows[-1][3] += 1
+                else:
+                    distinct_windows.append([start_idx, lo, hi, 1])
+            
+            for start_idx, lo, hi, n_starts in distinct_windows:
                 # Find all golden weekends (Friday dates) within this 4-week window
-                golden_weekends_in_window = []
-                for fri_date, is_golden_var in golden_weekends[r]:
-                    if start_date <= fri_date <= end_date:
-                        golden_weekends_in_window.append(is_golden_var)
+                golden_weekends_in_window = [is_golden_var for _, is_golden_var in golden_weekends[r][lo:hi]]
                 
                 # If there are potential golden weekends in this window, add constraint
                 if len(golden_weekends_in_window) >= 1:
@@ -815,7 +856,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
                     # Violation occurs if sum of golden weekends in window < 1
                     model.Add(sum(golden_weekends_in_window) >= 1).OnlyEnforceIf(violation.Not())
                     model.Add(sum(golden_weekends_in_window) == 0).OnlyEnforceIf(violation)
-                    golden_rotation_violations.append(violation)
+                    golden_rotation_violations.append(n_starts * violation)
         
         logging.info(f"Added {len(golden_rotation_violations)} golden weekend 4-week fallback constraints")
 
@@ -836,36 +877,84 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
         )
 
     # Constraint: backup PGY level must match call PGY level for each day (except holidays)
-    for d in range(n_days):
-        date_only = dates[d].date()
+    # Look up each day's call/backup PGY level with an element constraint and require them equal
+    pgy_values = [int(pgy) for pgy in pgy_levels]
+    pgy_domain = cp_model.Domain.FromValues(sorted(set(pgy_values)))
+    for d, date_only in enumerate(dates_as_date):
         # Skip PGY matching constraint for holiday dates (manual override)
         if date_only in holiday_map:
             continue
-        for r_call in range(n_residents):
-            for r_backup in range(n_residents):
-                if pgy_levels[r_call] != pgy_levels[r_backup]:
-                    # If call[d] == r_call and backup[d] == r_backup, this is forbidden
-                    model.AddForbiddenAssignments([call[d], backup[d]], [(r_call, r_backup)])
+        pgy_call = model.NewIntVarFromDomain(pgy_domain, f'pgy_call_{d}')
+        pgy_backup = model.NewIntVarFromDomain(pgy_domain, f'pgy_backup_{d}')
+        model.AddElement(call[d], pgy_values, pgy_call)
+        model.AddElement(backup[d], pgy_values, pgy_backup)
+        model.Add(pgy_call == pgy_backup)
+
+    # --- Warm start: greedy call/backup assignment passed to CP-SAT as a solution hint ---
+    # Each day takes the least-loaded PGY-matched pair that respects hard blocks and Q4/Q3 spacing
+    # against earlier greedy picks; days without such a pair are left unhinted
+    greedy_call = [None] * n_days
+    greedy_backup = [None] * n_days
+    greedy_load = [0] * n_residents
+    for d, date_only in enumerate(dates_as_date):
+        if date_only in holiday_map:
+            h = holiday_map[date_only]
+            if h['call'] in idx_of:
+                greedy_call[d] = idx_of[h['call']]
+            if h['backup'] in idx_of:
+                greedy_backup[d] = idx_of[h['backup']]
+        else:
+            recent_call = {greedy_call[p] for p in range(max(0, d - 3), d)}
+            recent_backup_3 = {greedy_backup[p] for p in range(max(0, d - 3), d)}
+            recent_backup_2 = {greedy_backup[p] for p in range(max(0, d - 2), d)}
+            for pgy in weekday_pgy[day_weekday_list[d]]:
+                candidates = sorted(
+                    (r for r in range(n_residents) if pgy_levels[r] == pgy and r not in hard_blocked[d]),
+                    key=lambda r: greedy_load[r]
+                )
+                call_pick = next((r for r in candidates if r not in recent_call and r not in recent_backup_3), None)
+                backup_pick = next((r for r in candidates if r != call_pick and r not in recent_call and r not in recent_backup_2), None)
+                if call_pick is not None and backup_pick is not None:
+                    greedy_call[d] = call_pick
+                    greedy_backup[d] = backup_pick
+                    break
+        for r in (greedy_call[d], greedy_backup[d]):
+            if r is not None:
+                greedy_load[r] += 1
+    for d in range(n_days):
+        if greedy_call[d] is not None:
+            model.AddHint(call[d], greedy_call[d])
+        if greedy_backup[d] is not None:
+            model.AddHint(backup[d], greedy_backup[d])
+
+    # Branch on call assignments in date order before backups
+    model.AddDecisionStrategy(call, cp_model.CHOOSE_FIRST, cp_model.SELECT_MIN_VALUE)
 
     # Solve
     solver = cp_model.CpSolver()
+    configure_solver(solver, dev_settings, max_time_in_seconds, relative_gap_limit)
+    # Let CP-SAT repair the greedy hint when it violates a soft-coupled or global constraint
+    solver.parameters.repair_hint = True
+    # Fixed seed so repeated runs on the same inputs have comparable search time
+    solver.parameters.random_seed = int(dev_settings.get('seed', 1))
+    solver.parameters.enumerate_all_solutions = False
     status = solver.Solve(model)
-    
+
     # Get the final objective value
     final_objective_value = solver.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
 
-    assignments = []
     golden_weekends_count = {}
     
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for d, date in enumerate(dates):
-            call_idx = solver.Value(call[d])
-            backup_idx = solver.Value(backup[d])
-            assignments.append({
-                'Date': date.date(),
-                'Call': residents[call_idx],
-                'Backup': residents[backup_idx]
-            })
+        # Read the whole solution vector once instead of one solver.Value call per variable
+        solution = solver.ResponseProto().solution
+        call_idx_arr = np.fromiter((solution[v.Index()] for v in call), dtype=np.int64, count=n_days)
+        backup_idx_arr = np.fromiter((solution[v.Index()] for v in backup), dtype=np.int64, count=n_days)
+        assignments = pd.DataFrame({
+            'Date': dates_np.astype(object),
+            'Call': [residents[i] for i in call_idx_arr],
+            'Backup': [residents[i] for i in backup_idx_arr]
+        })
         
         # Count golden weekends by rotation period if available, otherwise use totals
         if rotation_ranges:
@@ -876,7 +965,7 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
             # Count golden weekends for each PGY2 by rotation
             for r in pgy2_indices:
                 for fri_date, is_golden_var in golden_weekends[r]:
-                    if solver.Value(is_golden_var):
+                    if solution[is_golden_var.Index()]:
                         # Find which rotation this golden weekend belongs to
                         for rotation in rotation_ranges:
                             if rotation['start_date'] <= fri_date <= rotation['end_date']:
@@ -887,21 +976,117 @@ def generate_ortools_schedule(residents, pgy_levels, start_date, end_date, holid
             golden_weekends_count = {residents[r]: 0 for r in pgy2_indices}
             for r in pgy2_indices:
                 for fri_date, is_golden_var in golden_weekends[r]:
-                    if solver.Value(is_golden_var):
+                    if solution[is_golden_var.Index()]:
                         golden_weekends_count[residents[r]] += 1
     else:
         # No solution found
         return pd.DataFrame(columns=['Date', 'Call', 'Backup']), {residents[r]: 0 for r in pgy2_indices}, None
 
-    return pd.DataFrame(assignments), golden_weekends_count, final_objective_value 
+    return assignments, golden_weekends_count, final_objective_value 
 
-def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constraints, soft_constraints, dev_settings=None, intern_cap=None, rotation_periods=None):
+def generate_schedule_by_rotation(residents, pgy_levels, start_date, end_date, holidays, pgy4_call_cap, hard_constraints, soft_constraints, dev_settings, previous_block_data, block_transition, rotation_ranges, max_time_in_seconds=None, relative_gap_limit=None):
+    """
+    Solve generate_ortools_schedule independently for each rotation period and stitch the results.
+    Each rotation receives the last 4 stitched days as its block transition (so Q4/Q3 spacing holds across
+    rotation boundaries) and the running call/backup totals as previous block data (so fairness carries over).
+    The PGY-4 call cap is shared: each rotation gets the cap minus the most calls any PGY-4 has already taken.
+    Soft constraints spanning a rotation boundary (same-week, same-weekday spacing) are not enforced across it.
+    max_time_in_seconds is the budget for the whole decomposition: each segment gets an equal share of the
+    time still remaining (at least 1s), so time left over by fast segments goes to the later ones.
+    Both limits default to None and resolve through solver_limit exactly as in generate_ortools_schedule.
+    Returns the same (schedule_df, golden_weekends_count, objective) triple as generate_ortools_schedule.
+    """
+    max_time_in_seconds = solver_limit(dev_settings, 'max_time_in_seconds', max_time_in_seconds, 30.0)
+    relative_gap_limit = solver_limit(dev_settings, 'relative_gap_limit', relative_gap_limit, 0.01)
+    sub_settings = {**dev_settings, 'decompose_by_rotation': False}
+    names = [str(r).strip() for r in residents]
+    pgy2_names = [residents[r] for r, pgy in enumerate(pgy_levels) if pgy == 2]
+    pgy4_names = [residents[r] for r, pgy in enumerate(pgy_levels) if pgy == 4]
+
+    # Running totals per resident, seeded from the previous block
+    running_totals = {name: dict.fromkeys(PREVIOUS_BLOCK_TOTAL_COLUMNS, 0) for name in names}
+    if previous_block_data is not None:
+        total_values = previous_block_data.reindex(columns=PREVIOUS_BLOCK_TOTAL_COLUMNS, fill_value=0).to_numpy()
+        resident_names = previous_block_data['Resident'].astype(str).str.strip()
+        for resident_name, values in zip(resident_names, total_values):
+            if resident_name in running_totals:
+                running_totals[resident_name] = {column: int(value) for column, value in zip(PREVIOUS_BLOCK_TOTAL_COLUMNS, values)}
+
+    # Segment boundaries: each rotation clipped to the block, plus any uncovered head or tail
+    segments = []
+    cursor = start_date
+    for rotation in rotation_ranges:
+        seg_start = max(rotation['start_date'], start_date)
+        seg_end = min(rotation['end_date'], end_date)
+        if seg_start > seg_end:
+            continue
+        if cursor < seg_start:
+            segments.append((cursor, seg_start - timedelta(days=1), None))
+        segments.append((seg_start, seg_end, rotation['name']))
+        cursor = seg_end + timedelta(days=1)
+    if cursor <= end_date:
+        segments.append((cursor, end_date, None))
+
+    schedule_parts = []
+    golden_weekends_count = {rotation['name']: {name: 0 for name in pgy2_names} for rotation in rotation_ranges}
+    total_objective = 0.0
+    transition = block_transition
+    pgy4_calls = {name: 0 for name in pgy4_names}
+    deadline = time.monotonic() + max_time_in_seconds
+    for seg_num, (seg_start, seg_end, rotation_name) in enumerate(segments):
+        logging.info(f"Solving rotation segment {rotation_name or 'outside rotations'}: {seg_start} to {seg_end}")
+        segment_rotations = []
+        if rotation_name is not None:
+            segment_rotations = [
+                {'switch_date': seg_start, 'rotation_name': rotation_name},
+                {'switch_date': seg_end + timedelta(days=1), 'rotation_name': 'end'}
+            ]
+        segment_cap = None
+        if pgy4_call_cap is not None:
+            segment_cap = max(0, pgy4_call_cap - max(pgy4_calls.values(), default=0))
+        previous_df = pd.DataFrame([{'Resident': name, **totals} for name, totals in running_totals.items()])
+        segment_time = max(1.0, (deadline - time.monotonic()) / (len(segments) - seg_num))
+
+        part_df, part_golden, part_objective = generate_ortools_schedule(
+            residents, pgy_levels, seg_start, seg_end, holidays, segment_cap, hard_constraints,
+            soft_constraints, sub_settings, previous_df, transition, segment_rotations,
+            segment_time, relative_gap_limit
+        )
+        if part_objective is None:
+            logging.warning(f"No solution for rotation segment {seg_start} to {seg_end}")
+            return pd.DataFrame(columns=['Date', 'Call', 'Backup']), {name: 0 for name in pgy2_names}, None
+        schedule_parts.append(part_df)
+        total_objective += part_objective
+        if rotation_name is not None:
+            golden_weekends_count[rotation_name] = part_golden.get(rotation_name, golden_weekends_count[rotation_name])
+
+        # Carry running totals, the PGY-4 cap usage and the spacing transition into the next segment
+        for row in part_df.itertuples(index=False):
+            wd = row.Date.weekday()
+            day_type = {4: 'Friday', 5: 'Saturday', 6: 'Sunday'}.get(wd, 'Weekday')
+            for role, name in (('Call', row.Call), ('Backup', row.Backup)):
+                name = str(name).strip()
+                if name in running_totals:
+                    running_totals[name][f'{role}_{day_type}'] += 1
+                    running_totals[name][f'{role}_Total'] += 1
+            if row.Call in pgy4_calls:
+                pgy4_calls[row.Call] += 1
+        transition = {
+            f'day{i + 1}': {'date': row.Date, 'call': row.Call, 'backup': row.Backup}
+            for i, row in enumerate(part_df.tail(4).itertuples(index=False))
+        }
+
+    schedule_df = pd.concat(schedule_parts, ignore_index=True)
+    return schedule_df, golden_weekends_count, total_objective
+
+def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constraints, soft_constraints, dev_settings=None, intern_cap=None, rotation_periods=None, copy=True):
     """
     OPTIMIZED: Uses simplified OR-Tools CP-SAT to efficiently optimize intern assignments.
     Focuses on essential constraints only for better performance.
     
     Args:
         intern_cap: Maximum number of assignments per intern per 4-week period (default: no limit)
+        copy: Work on a copy of schedule_df; pass False to add the Intern column in place
     """
     if dev_settings is None:
         dev_settings = {}
@@ -940,26 +1125,23 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     
     if not intern_names:
         # No interns to assign
-        schedule_df = schedule_df.copy()
+        if copy:
+            schedule_df = schedule_df.copy()
         schedule_df['Intern'] = None
         return schedule_df, pd.DataFrame(), None
     
     # Find days where interns can be assigned (PGY3/PGY4 on call)
-    intern_days = []
-    for idx, row in schedule_df.iterrows():
-        call = row['Call']
-        call_pgy = None
-        if call in residents:
-            call_pgy = pgy_levels[residents.index(call)]
-        if call_pgy in [3, 4]:
-            intern_days.append(idx)
+    resident_to_pgy = dict(zip(residents, pgy_levels))
+    call_pgy_series = schedule_df['Call'].map(resident_to_pgy)
+    intern_days = schedule_df.index[call_pgy_series.isin([3, 4])].tolist()
     
     logging.info(f"Found {len(intern_days)} intern days for {len(intern_names)} interns")
     
     if not intern_days:
         # No days where interns can be assigned
         logging.warning("No intern days found - no PGY3/PGY4 call assignments in schedule")
-        schedule_df = schedule_df.copy()
+        if copy:
+            schedule_df = schedule_df.copy()
         schedule_df['Intern'] = None
         return schedule_df, pd.DataFrame(), None
     
@@ -971,12 +1153,7 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
         # Hard constraints - same as before but more efficient
         for rng in hard_constraints.get(name, []):
             start, end = rng
-            # Direct date iteration instead of pd.date_range
-            current = start if hasattr(start, 'date') else pd.to_datetime(start).date()
-            end_date = end if hasattr(end, 'date') else pd.to_datetime(end).date()
-            while current <= end_date:
-                hard_lookup[name].add(current)
-                current += pd.Timedelta(days=1).to_pytimedelta()
+            hard_lookup[name].update(pd.date_range(start=pd.Timestamp(start), end=pd.Timestamp(end), freq='D').date)
         
         # Soft constraints - only track "Non-call request" and "VA" (high/medium priority)
         for sc in soft_constraints.get(name, []):
@@ -988,36 +1165,35 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
             
             # Only process high/medium-priority soft constraints (Non-call request and VA)
             if priority in ["Non-call request", "VA"]:
-                current = start if hasattr(start, 'date') else pd.to_datetime(start).date()
-                end_date = end if hasattr(end, 'date') else pd.to_datetime(end).date()
-                while current <= end_date:
-                    soft_violations_lookup[name].add(current)
-                    current += pd.Timedelta(days=1).to_pytimedelta()
+                soft_violations_lookup[name].update(pd.date_range(start=pd.Timestamp(start), end=pd.Timestamp(end), freq='D').date)
+    
+    # Parse intern-day dates once: day-resolution array (for np.searchsorted windows),
+    # datetime.date per day (for constraint lookups) and weekday per day
+    intern_dates_np = pd.to_datetime(schedule_df['Date'].iloc[intern_days]).values.astype('datetime64[D]')
+    intern_day_dates = intern_dates_np.astype(object).tolist()
+    _, intern_weekdays_np = day_ordinals_and_weekdays(intern_dates_np)
     
     # Create OR-Tools model
     model = cp_model.CpModel()
     n_intern_days = len(intern_days)
     n_interns = len(intern_names)
     
-    # Create assignment variables
+    # is_var[d_idx, i]: intern i is not hard-blocked on intern day d_idx and so has an assignment variable
+    is_var = np.array([[date not in hard_lookup[intern_name] for intern_name in intern_names]
+                       for date in intern_day_dates], dtype=bool).reshape(n_intern_days, n_interns)
+
+    # Create assignment variables (hard-blocked pairs get none)
     intern_assigned = {}
-    for d_idx, day_idx in enumerate(intern_days):
+    for d_idx in range(n_intern_days):
         intern_assigned[d_idx] = {}
-        for i, intern_name in enumerate(intern_names):
-            date = pd.to_datetime(schedule_df.iloc[day_idx]['Date']).date()
-            if date in hard_lookup[intern_name]:
-                intern_assigned[d_idx][i] = model.NewConstant(0)
-            else:
+        for i in range(n_interns):
+            if is_var[d_idx, i]:
                 intern_assigned[d_idx][i] = model.NewBoolVar(f'intern_{d_idx}_{i}')
     
     # Constraint: Each intern day must have exactly one intern assigned
     for d_idx in range(n_intern_days):
-        day_idx = intern_days[d_idx]
-        date = pd.to_datetime(schedule_df.iloc[day_idx]['Date']).date()
-        eligible_interns = []
-        for i, intern_name in enumerate(intern_names):
-            if date not in hard_lookup[intern_name]:
-                eligible_interns.append(intern_assigned[d_idx][i])
+        date = intern_day_dates[d_idx]
+        eligible_interns = [intern_assigned[d_idx][i] for i in range(n_interns) if is_var[d_idx, i]]
         
         if eligible_interns:
             model.Add(sum(eligible_interns) == 1)
@@ -1027,75 +1203,66 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     
     # OPTIMIZED: Simplified constraints for better performance
     
-    # Prevent 3+ consecutive intern slot assignments (allow up to 2)
-    # Also add soft penalty for any consecutive assignments to discourage when possible
+    # One pass per intern over the intern days:
+    # - prevent 3+ consecutive intern slot assignments (allow up to 2)
+    # - soft penalty for any 2 consecutive assignments to discourage when possible
+    # - tally assignments for fairness (total, weekday, Saturday)
     consecutive_hard_constraints = 0
     consecutive_soft_penalties = []
-    
-    for i, intern_name in enumerate(intern_names):
-        # Hard constraint: prevent 3+ consecutive intern slots
-        for d1_idx in range(n_intern_days - 2):  # Check triplets
-            d2_idx = d1_idx + 1
-            d3_idx = d1_idx + 2
-            
-            if (isinstance(intern_assigned[d1_idx][i], cp_model.IntVar) and 
-                isinstance(intern_assigned[d2_idx][i], cp_model.IntVar) and
-                isinstance(intern_assigned[d3_idx][i], cp_model.IntVar)):
-                # Prevent all 3 consecutive slots being assigned to same intern
-                model.Add(intern_assigned[d1_idx][i] + intern_assigned[d2_idx][i] + intern_assigned[d3_idx][i] <= 2)
-                consecutive_hard_constraints += 1
-        
-        # Soft penalty: discourage any 2 consecutive assignments when possible
-        for d1_idx in range(n_intern_days - 1):
-            d2_idx = d1_idx + 1
-            
-            if (isinstance(intern_assigned[d1_idx][i], cp_model.IntVar) and 
-                isinstance(intern_assigned[d2_idx][i], cp_model.IntVar)):
-                # Create penalty variable for consecutive assignments
-                consecutive_penalty = model.NewBoolVar(f'consecutive_penalty_{i}_{d1_idx}')
-                model.AddBoolAnd([intern_assigned[d1_idx][i], intern_assigned[d2_idx][i]]).OnlyEnforceIf(consecutive_penalty)
-                model.AddBoolOr([intern_assigned[d1_idx][i].Not(), intern_assigned[d2_idx][i].Not()]).OnlyEnforceIf(consecutive_penalty.Not())
-                consecutive_soft_penalties.append(consecutive_penalty)
-
-    logging.info(f"Added {consecutive_hard_constraints} hard constraints (prevent 3+ consecutive) and {len(consecutive_soft_penalties)} soft penalties (discourage 2 consecutive)")
-
-    # Track assignments for fairness (total, weekday, Saturday)
     intern_total_counts = []
     intern_weekday_counts = []
     intern_saturday_counts = []
-
-    for i in range(n_interns):
+    has_weekday = bool((intern_weekdays_np < 5).any())
+    has_saturday = bool((intern_weekdays_np == 5).any())
+    
+    for i, intern_name in enumerate(intern_names):
         total_assignments = []
         weekday_assignments = []
         saturday_assignments = []
 
-        for d_idx, day_idx in enumerate(intern_days):
-            date = pd.to_datetime(schedule_df.iloc[day_idx]['Date'])
-            weekday = date.weekday()
+        for d_idx in range(n_intern_days):
+            if not is_var[d_idx, i]:
+                continue
+            assignment_var = intern_assigned[d_idx][i]
+            
+            if d_idx >= 1 and is_var[d_idx - 1, i]:
+                prev_var = intern_assigned[d_idx - 1][i]
+                # Create penalty variable for consecutive assignments; the objective minimizes it,
+                # so the lower bound alone makes it equal x1 AND x2 at the optimum
+                consecutive_penalty = model.NewBoolVar(f'consecutive_penalty_{i}_{d_idx - 1}')
+                model.Add(consecutive_penalty >= prev_var + assignment_var - 1)
+                consecutive_soft_penalties.append(consecutive_penalty)
+                
+                if d_idx >= 2 and is_var[d_idx - 2, i]:
+                    # Prevent all 3 consecutive slots being assigned to same intern
+                    model.Add(intern_assigned[d_idx - 2][i] + prev_var + assignment_var <= 2)
+                    consecutive_hard_constraints += 1
             
-            assignment_var = intern_assigned[d_idx].get(i)
-            if isinstance(assignment_var, cp_model.IntVar):
-                total_assignments.append(assignment_var)
-                if weekday < 5:  # Weekday (Mon-Fri)
-                    weekday_assignments.append(assignment_var)
-                elif weekday == 5:  # Saturday
-                    saturday_assignments.append(assignment_var)
+            weekday = intern_weekdays_np[d_idx]
+            total_assignments.append(assignment_var)
+            if weekday < 5:  # Weekday (Mon-Fri)
+                weekday_assignments.append(assignment_var)
+            elif weekday == 5:  # Saturday
+                saturday_assignments.append(assignment_var)
 
-        if total_assignments:
+        # An intern hard-blocked on every day of a type still counts as 0 in that type's fairness
+        if n_intern_days:
             intern_total_counts.append(sum(total_assignments))
-        if weekday_assignments:
+        if has_weekday:
             intern_weekday_counts.append(sum(weekday_assignments))
-        if saturday_assignments:
+        if has_saturday:
             intern_saturday_counts.append(sum(saturday_assignments))
+
+    logging.info(f"Added {consecutive_hard_constraints} hard constraints (prevent 3+ consecutive) and {len(consecutive_soft_penalties)} soft penalties (discourage 2 consecutive)")
             
     # SIMPLIFIED: Only track high-priority soft constraint violations
-    soft_violations = []
-    for d_idx, day_idx in enumerate(intern_days):
-        date = pd.to_datetime(schedule_df.iloc[day_idx]['Date']).date()
-        for i, intern_name in enumerate(intern_names):
-            if isinstance(intern_assigned[d_idx][i], cp_model.IntVar):
-                if date in soft_violations_lookup[intern_name]:
-                    soft_violations.append(intern_assigned[d_idx][i])
+    viol_pairs = [
+        (d_idx, i)
+        for i, intern_name in enumerate(intern_names)
+        for d_idx, date in enumerate(intern_day_dates)
+        if date in soft_violations_lookup[intern_name] and is_var[d_idx, i]
+    ]
+    soft_violations = [intern_assigned[d_idx][i] for d_idx, i in viol_pairs]
     
     logging.info(f"Tracking {len(soft_violations)} high/medium-priority soft constraint violations (Non-call request and VA)")
     
@@ -1103,9 +1270,9 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     # Build mapping of intern days to their senior (PGY3/4 on call)
     intern_day_to_senior = {}
     senior_names = set()
-    for d_idx, day_idx in enumerate(intern_days):
-        call_resident = schedule_df.iloc[day_idx]['Call']
-        call_pgy = pgy_levels[residents.index(call_resident)] if call_resident in residents else None
+    intern_day_calls = schedule_df['Call'].iloc[intern_days].tolist()
+    for d_idx, call_resident in enumerate(intern_day_calls):
+        call_pgy = resident_to_pgy.get(call_resident)
         if call_pgy in [3, 4]:  # Only PGY3/4 can have interns
             intern_day_to_senior[d_idx] = call_resident
             senior_names.add(call_resident)
@@ -1122,9 +1289,8 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
                 count_vars = []
                 for d_idx, day_idx in enumerate(intern_days):
                     if d_idx in intern_day_to_senior and intern_day_to_senior[d_idx] == senior_name:
-                        assignment_var = intern_assigned[d_idx].get(i)
-                        if isinstance(assignment_var, cp_model.IntVar):
-                            count_vars.append(assignment_var)
+                        if is_var[d_idx, i]:
+                            count_vars.append(intern_assigned[d_idx][i])
                 
                 if count_vars:
                     count_var = model.NewIntVar(0, n_intern_days, f'intern_{i}_senior_{s_idx}_count')
@@ -1145,6 +1311,13 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
         variety_obj = 0
         logging.info("No seniors found for variety tracking")
     
+    # [lo, hi) intern-day index bounds of each rotation period
+    rotation_bounds = [
+        (np.searchsorted(intern_dates_np, np.datetime64(rotation['start_date'], 'D')),
+         np.searchsorted(intern_dates_np, np.datetime64(rotation['end_date'], 'D'), side='right'))
+        for rotation in rotation_ranges
+    ]
+    
     # Intern cap constraint: Maximum assignments per intern per rotation period (or 4-week period if no rotations)
     if intern_cap is not None and intern_cap > 0:
         cap_constraints = 0
@@ -1152,19 +1325,12 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
         if rotation_ranges:
             # Use rotation periods
             for i, intern_name in enumerate(intern_names):
-                for rotation in rotation_ranges:
-                    rotation_start = rotation['start_date']
-                    rotation_end = rotation['end_date']
-                    
+                for lo, hi in rotation_bounds:
                     # Find all intern days within this rotation period
                     rotation_assignments = []
-                    for d_idx, day_idx in enumerate(intern_days):
-                        check_date = pd.to_datetime(schedule_df.iloc[day_idx]['Date']).date()
-                        
-                        if rotation_start <= check_date <= rotation_end:
-                            assignment_var = intern_assigned[d_idx].get(i)
-                            if isinstance(assignment_var, cp_model.IntVar):
-                                rotation_assignments.append(assignment_var)
+                    for d_idx in range(lo, hi):
+                        if is_var[d_idx, i]:
+                            rotation_assignments.append(intern_assigned[d_idx][i])
                     
                     # Apply cap constraint to this rotation period
                     if len(rotation_assignments) > intern_cap:
@@ -1175,26 +1341,25 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
         else:
             # Fallback to 4-week rolling windows
             window_size_days = 28  # 4 weeks = 28 days
+            # Exclusive end index of the 4-week window starting at each intern day
+            window_ends = np.searchsorted(intern_dates_np, intern_dates_np + np.timedelta64(window_size_days - 1, 'D'), side='right')
             
             for i, intern_name in enumerate(intern_names):
                 # For each possible 4-week window, ensure intern doesn't exceed cap
+                prev_end = 0
                 for start_idx in range(n_intern_days):
-                    # Define the 4-week window starting from this day
-                    start_day_idx = intern_days[start_idx]
-                    start_date = pd.to_datetime(schedule_df.iloc[start_day_idx]['Date']).date()
-                    end_date = start_date + pd.Timedelta(days=window_size_days - 1).to_pytimedelta()
+                    # A window that picks up no new assignable day past the previous window's end
+                    # is a subset of that window, so its cap is already implied
+                    new_days = range(prev_end, window_ends[start_idx])
+                    prev_end = window_ends[start_idx]
+                    if not any(is_var[k, i] for k in new_days):
+                        continue
                     
                     # Find all intern days within this 4-week window
                     window_assignments = []
-                    for check_idx in range(start_idx, n_intern_days):
-                        check_day_idx = intern_days[check_idx]
-                        check_date = pd.to_datetime(schedule_df.iloc[check_day_idx]['Date']).date()
-                        
-                        if start_date <= check_date <= end_date:
-                            if isinstance(intern_assigned[check_idx][i], cp_model.IntVar):
-                                window_assignments.append(intern_assigned[check_idx][i])
-                        elif check_date > end_date:
-                            break  # Days are sorted, so we can break early
+                    for check_idx in range(start_idx, window_ends[start_idx]):
+                        if is_var[check_idx, i]:
+                            window_assignments.append(intern_assigned[check_idx][i])
                     
                     # Apply cap constraint to this 4-week window
                     if len(window_assignments) > intern_cap:
@@ -1211,21 +1376,14 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     if rotation_ranges:
         # Use rotation periods
         for i, intern_name in enumerate(intern_names):
-            for rotation in rotation_ranges:
-                rotation_start = rotation['start_date']
-                rotation_end = rotation['end_date']
-                
+            for lo, hi in rotation_bounds:
                 # Find all Saturday intern days within this rotation period
                 saturday_assignments = []
-                for d_idx, day_idx in enumerate(intern_days):
-                    check_date = pd.to_datetime(schedule_df.iloc[day_idx]['Date']).date()
-                    
-                    if rotation_start <= check_date <= rotation_end:
-                        # Check if this is a Saturday
-                        if check_date.weekday() == 5:  # Saturday
-                            assignment_var = intern_assigned[d_idx].get(i)
-                            if isinstance(assignment_var, cp_model.IntVar):
-                                saturday_assignments.append(assignment_var)
+                for d_idx in range(lo, hi):
+                    # Check if this is a Saturday
+                    if intern_weekdays_np[d_idx] == 5:  # Saturday
+                        if is_var[d_idx, i]:
+                            saturday_assignments.append(intern_assigned[d_idx][i])
                 
                 # Apply Saturday cap constraint to this rotation period (max 2 Saturdays)
                 if len(saturday_assignments) > 2:
@@ -1236,28 +1394,26 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     else:
         # Fallback to 4-week rolling windows
         window_size_days = 28  # 4 weeks = 28 days
+        # Exclusive end index of the 4-week window starting at each intern day
+        window_ends = np.searchsorted(intern_dates_np, intern_dates_np + np.timedelta64(window_size_days - 1, 'D'), side='right')
         
         for i, intern_name in enumerate(intern_names):
             # For each possible 4-week window, ensure intern doesn't exceed 2 Saturday assignments
+            prev_end = 0
             for start_idx in range(n_intern_days):
-                # Define the 4-week window starting from this day
-                start_day_idx = intern_days[start_idx]
-                start_date = pd.to_datetime(schedule_df.iloc[start_day_idx]['Date']).date()
-                end_date = start_date + pd.Timedelta(days=window_size_days - 1).to_pytimedelta()
+                # Skip windows that add no new assignable Saturday (implied by the previous window)
+                new_days = range(prev_end, window_ends[start_idx])
+                prev_end = window_ends[start_idx]
+                if not any(intern_weekdays_np[k] == 5 and is_var[k, i] for k in new_days):
+                    continue
                 
                 # Find all Saturday intern days within this 4-week window
                 saturday_assignments = []
-                for check_idx in range(start_idx, n_intern_days):
-                    check_day_idx = intern_days[check_idx]
-                    check_date = pd.to_datetime(schedule_df.iloc[check_day_idx]['Date']).date()
-                    
-                    if start_date <= check_date <= end_date:
-                        # Check if this is a Saturday
-                        if check_date.weekday() == 5:  # Saturday
-                            if isinstance(intern_assigned[check_idx][i], cp_model.IntVar):
-                                saturday_assignments.append(intern_assigned[check_idx][i])
-                    elif check_date > end_date:
-                        break  # Days are sorted, so we can break early
+                for check_idx in range(start_idx, window_ends[start_idx]):
+                    # Check if this is a Saturday
+                    if intern_weekdays_np[check_idx] == 5:  # Saturday
+                        if is_var[check_idx, i]:
+                            saturday_assignments.append(intern_assigned[check_idx][i])
                 
                 # Apply Saturday cap constraint to this 4-week window (max 2 Saturdays)
                 if len(saturday_assignments) > 2:
@@ -1275,14 +1431,16 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     intern_senior_variety_weight = dev_settings.get('intern_senior_variety_weight', 2.0)
     
     # Fairness optimization with day-type specificity
-    soft_obj = sum(soft_violations) if soft_violations else 0
+    soft_obj = cp_model.LinearExpr.Sum(soft_violations) if soft_violations else 0
     
     # Total count fairness
+    # The spread is minimized, so plain upper/lower envelopes are tight at the optimum
     if len(intern_total_counts) > 1:
         max_total = model.NewIntVar(0, n_intern_days, 'max_total')
         min_total = model.NewIntVar(0, n_intern_days, 'min_total')
-        model.AddMaxEquality(max_total, intern_total_counts)
-        model.AddMinEquality(min_total, intern_total_counts)
+        for count in intern_total_counts:
+            model.Add(count <= max_total)
+            model.Add(count >= min_total)
         total_fairness_obj = max_total - min_total
     else:
         total_fairness_obj = 0
@@ -1291,8 +1449,9 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     if len(intern_weekday_counts) > 1:
         max_weekday = model.NewIntVar(0, n_intern_days, 'max_weekday')
         min_weekday = model.NewIntVar(0, n_intern_days, 'min_weekday')
-        model.AddMaxEquality(max_weekday, intern_weekday_counts)
-        model.AddMinEquality(min_weekday, intern_weekday_counts)
+        for count in intern_weekday_counts:
+            model.Add(count <= max_weekday)
+            model.Add(count >= min_weekday)
         weekday_fairness_obj = max_weekday - min_weekday
     else:
         weekday_fairness_obj = 0
@@ -1301,46 +1460,57 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
     if len(intern_saturday_counts) > 1:
         max_saturday = model.NewIntVar(0, n_intern_days, 'max_saturday')
         min_saturday = model.NewIntVar(0, n_intern_days, 'min_saturday')
-        model.AddMaxEquality(max_saturday, intern_saturday_counts)
-        model.AddMinEquality(min_saturday, intern_saturday_counts)
+        for count in intern_saturday_counts:
+            model.Add(count <= max_saturday)
+            model.Add(count >= min_saturday)
         saturday_fairness_obj = max_saturday - min_saturday
     else:
         saturday_fairness_obj = 0
 
     # Balanced objective function with day-type fairness and variety
-    consecutive_penalty_obj = sum(consecutive_soft_penalties) if consecutive_soft_penalties else 0
+    consecutive_penalty_obj = cp_model.LinearExpr.Sum(consecutive_soft_penalties) if consecutive_soft_penalties else 0
     
     # Build objective terms
     # Note: CP-SAT expressions can't be compared to 0, so we check list lengths or weights instead
+    # Parallel lists of objective expressions and their weights, combined in one WeightedSum
     objective_terms = []
+    objective_weights = []
     if len(intern_total_counts) > 1 and intern_total_fairness_weight > 0:
-        objective_terms.append(intern_total_fairness_weight * total_fairness_obj)
+        objective_terms.append(total_fairness_obj)
+        objective_weights.append(intern_total_fairness_weight)
     if len(intern_weekday_counts) > 1 and intern_weekday_fairness_weight > 0:
-        objective_terms.append(intern_weekday_fairness_weight * weekday_fairness_obj)
+        objective_terms.append(weekday_fairness_obj)
+        objective_weights.append(intern_weekday_fairness_weight)
     if len(intern_saturday_counts) > 1 and intern_saturday_fairness_weight > 0:
-        objective_terms.append(intern_saturday_fairness_weight * saturday_fairness_obj)
+        objective_terms.append(saturday_fairness_obj)
+        objective_weights.append(intern_saturday_fairness_weight)
     if soft_violations and intern_soft_constraint_weight > 0:
-        objective_terms.append(intern_soft_constraint_weight * soft_obj)
+        objective_terms.append(soft_obj)
+        objective_weights.append(intern_soft_constraint_weight)
     if consecutive_soft_penalties and intern_consecutive_penalty_weight > 0:
-        objective_terms.append(intern_consecutive_penalty_weight * consecutive_penalty_obj)
+        objective_terms.append(consecutive_penalty_obj)
+        objective_weights.append(intern_consecutive_penalty_weight)
     if intern_senior_variety_weight > 0:
         # variety_obj is either a CP-SAT IntVar (when tracking pairs) or integer 0 (when no pairs)
         if isinstance(variety_obj, int):
             # If it's an integer, only add if non-zero
             if variety_obj != 0:
-                objective_terms.append(intern_senior_variety_weight * variety_obj)
+                objective_terms.append(variety_obj)
+                objective_weights.append(intern_senior_variety_weight)
         else:
             # If it's a CP-SAT variable, always add it (it represents max_pairing)
-            objective_terms.append(intern_senior_variety_weight * variety_obj)
+            objective_terms.append(variety_obj)
+            objective_weights.append(intern_senior_variety_weight)
     
     if objective_terms:
-        model.Minimize(sum(objective_terms))
+        model.Minimize(cp_model.LinearExpr.WeightedSum(objective_terms, objective_weights))
         logging.info(f"Objective: {intern_total_fairness_weight}*total + {intern_weekday_fairness_weight}*weekday + {intern_saturday_fairness_weight}*saturday + {intern_soft_constraint_weight}*soft_violations + {intern_consecutive_penalty_weight}*consecutive_penalties + {intern_senior_variety_weight}*variety")
     else:
         logging.warning("No objective terms - all weights may be zero or no constraints")
     
-    # Solve
+    # Solve (bounded: the intern model is small, so 60s is ample to reach or prove a good solution)
     solver = cp_model.CpSolver()
+    configure_solver(solver, dev_settings, max_time_in_seconds=solver_limit(dev_settings, 'max_time_in_seconds', None, 60.0))
     status = solver.Solve(model)
     
     # Log solver status
@@ -1352,43 +1522,37 @@ def optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constra
         logging.warning(f"Intern assignment optimization failed with status: {status}")
     
     # Extract solution
-    schedule_df = schedule_df.copy()
-    schedule_df['Intern'] = None
+    if copy:
+        schedule_df = schedule_df.copy()
+    # Fill a positional column and assign it once rather than writing cells through .at
+    pos_of = {label: pos for pos, label in enumerate(schedule_df.index)}
+    intern_col = [None] * len(schedule_df)
     
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        # Interns with an assignment variable on each intern day
+        var_positions = [np.flatnonzero(is_var[d_idx]).tolist() for d_idx in range(n_intern_days)]
         for d_idx, day_idx in enumerate(intern_days):
-            for i, intern_name in enumerate(intern_names):
-                if isinstance(intern_assigned[d_idx][i], cp_model.IntVar):
-                    if solver.Value(intern_assigned[d_idx][i]):
-                        schedule_df.at[day_idx, 'Intern'] = intern_name
-                        break
+            for i in var_positions[d_idx]:
+                if solver.BooleanValue(intern_assigned[d_idx][i]):
+                    intern_col[pos_of[day_idx]] = intern_names[i]
+                    break
+    schedule_df['Intern'] = intern_col
     
     # SIMPLIFIED: Build basic fairness summary
-    intern_counts = {name: 0 for name in intern_names}
-    intern_weekday = {name: 0 for name in intern_names}  
-    intern_saturday = {name: 0 for name in intern_names}
-    
-    for idx, row in schedule_df.iterrows():
-        intern = row.get('Intern')
-        if intern in intern_names:
-            date = pd.to_datetime(row['Date'])
-            weekday = date.weekday()
-            intern_counts[intern] += 1
-            if weekday < 5:
-                intern_weekday[intern] += 1
-            elif weekday == 5:
-                intern_saturday[intern] += 1
+    assigned = schedule_df[schedule_df['Intern'].isin(intern_names)]
+    assigned_weekdays = pd.to_datetime(assigned['Date']).dt.weekday.to_numpy()
+    day_bucket = np.where(assigned_weekdays < 5, 'Weekday', np.where(assigned_weekdays == 5, 'Saturday', 'Other'))
+    bucket_counts = pd.crosstab(assigned['Intern'].to_numpy(), day_bucket).reindex(
+        index=intern_names, columns=['Weekday', 'Saturday', 'Other'], fill_value=0
+    )
     
-    fairness_data = []
-    for name in intern_names:
-        fairness_data.append({
-            'Resident': name,
-            'Total': intern_counts[name],
-            'Weekday': intern_weekday[name],
-            'Saturday': intern_saturday[name]
-        })
+    intern_fairness_df = pd.DataFrame({
+        'Resident': intern_names,
+        'Total': bucket_counts.sum(axis=1).to_numpy(),
+        'Weekday': bucket_counts['Weekday'].to_numpy(),
+        'Saturday': bucket_counts['Saturday'].to_numpy()
+    })
     
-    intern_fairness_df = pd.DataFrame(fairness_data)
     objective_value = solver.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
     
     return schedule_df, intern_fairness_df, objective_value
@@ -1400,32 +1564,42 @@ def assign_interns(schedule_df, residents, pgy_levels, hard_constraints, soft_co
     """
     return optimize_intern_assignments(schedule_df, residents, pgy_levels, hard_constraints, soft_constraints, None, None)
 
-def assign_supervisors(schedule_df, residents, pgy_levels, hard_constraints, soft_constraints, holidays=None):
+def assign_supervisors(schedule_df, residents, pgy_levels, hard_constraints, soft_constraints, holidays=None, copy=True):
     """
     Assign supervisors (PGY3/4) to each day a PGY2 is on call (except Sundays and holidays).
     - Saturday call resident is the Friday supervisor.
     - No one can be supervisor the day after being on call.
     - Apply hard constraints and only 'Non-call request' soft constraints.
     - Spread assignments fairly.
-    - Adds a 'Supervisor' column to schedule_df.
+    - Adds a 'Supervisor' column to schedule_df (in place when copy=False).
     - Returns updated DataFrame.
     """
-    schedule_df = schedule_df.copy()
-    schedule_df['Supervisor'] = None
+    if copy:
+        schedule_df = schedule_df.copy()
     if holidays is None:
         holidays = []
-    holiday_dates = set(pd.to_datetime(h['date']).date() for h in holidays if 'date' in h)
+    holiday_ords = frozenset(pd.to_datetime(h['date']).toordinal() for h in holidays if 'date' in h)
     # Identify eligible supervisors
+    resident_to_pgy = dict(zip(residents, pgy_levels))
     supervisor_indices = [i for i, pgy in enumerate(pgy_levels) if pgy in [3, 4]]
     supervisor_names = [residents[i] for i in supervisor_indices]
-    # Build hard constraint lookup
+    supervisor_name_set = frozenset(supervisor_names)
+    # Date column parsed once; weekday and ordinal are both derived from the day-resolution array
+    day_np = pd.to_datetime(schedule_df['Date']).values.astype('datetime64[D]')
+    day_ordinals, day_weekdays = day_ordinals_and_weekdays(day_np)
+    day_ordinals = day_ordinals.tolist()
+    # Constraint ranges are clipped to the schedule so lookups only hold days that can be queried
+    schedule_ords = frozenset(day_ordinals)
+    first_ord = min(day_ordinals, default=0)
+    last_ord = max(day_ordinals, default=-1)
+    # Build hard constraint lookup (sets of day ordinals)
     hard_lookup = defaultdict(set)
     for name in supervisor_names:
         for rng in hard_constraints.get(name, []):
             start, end = rng
-            days = pd.date_range(start, end)
-            for d in days:
-                hard_lookup[name].add(pd.to_datetime(d).date())
+            start_ord = max(pd.to_datetime(start).toordinal(), first_ord)
+            end_ord = min(pd.to_datetime(end).toordinal(), last_ord)
+            hard_lookup[name].update(schedule_ords.intersection(range(start_ord, end_ord + 1)))
     # Build soft constraint lookup (only Non-call request and VA)
     soft_lookup = defaultdict(set)
     for name in supervisor_names:
@@ -1437,23 +1611,35 @@ def assign_supervisors(schedule_df, residents, pgy_levels, hard_constraints, sof
                 start, end, priority = sc
             if priority not in ["Non-call request", "VA"]:
                 continue
-            days = pd.date_range(start, end)
-            for d in days:
-                soft_lookup[name].add(pd.to_datetime(d).date())
+            start_ord = max(pd.to_datetime(start).toordinal(), first_ord)
+            end_ord = min(pd.to_datetime(end).toordinal(), last_ord)
+            soft_lookup[name].update(schedule_ords.intersection(range(start_ord, end_ord + 1)))
+    # Invert the lookups: day ordinal -> supervisors blocked that day
+    hard_blocked_on = defaultdict(set)
+    for name, ordinals in hard_lookup.items():
+        for ordinal in ordinals:
+            hard_blocked_on[ordinal].add(name)
+    soft_blocked_on = defaultdict(set)
+    for name, ordinals in soft_lookup.items():
+        for ordinal in ordinals:
+            soft_blocked_on[ordinal].add(name)
+    # Ties on assignment count go to the earlier supervisor in roster order
+    supervisor_position = {name: pos for pos, name in enumerate(supervisor_names)}
     # Track supervisor assignments
     supervisor_counts = {name: 0 for name in supervisor_names}
     # Track who was on call the previous day
     prev_call = None
     prev_supervisor = None
-    for idx, row in schedule_df.iterrows():
-        date = pd.to_datetime(row['Date']).date()
-        weekday = pd.to_datetime(row['Date']).weekday()
-        call = row['Call']
-        call_pgy = None
-        if call in residents:
-            call_pgy = pgy_levels[residents.index(call)]
+    # Per-day columns as plain arrays; supervisors are collected and assigned as one column
+    calls = schedule_df['Call'].to_numpy()
+    supervisors = [None] * len(schedule_df)
+    for idx in range(len(schedule_df)):
+        date_ord = day_ordinals[idx]
+        weekday = day_weekdays[idx]
+        call = calls[idx]
+        call_pgy = resident_to_pgy.get(call)
         # Skip Sundays and holidays
-        if weekday == 6 or date in holiday_dates:
+        if weekday == 6 or date_ord in holiday_ords:
             prev_call = call
             prev_supervisor = None
             continue
@@ -1467,33 +1653,30 @@ def assign_supervisors(schedule_df, residents, pgy_levels, hard_constraints, sof
             # Find Saturday row
             sat_idx = idx + 1 if idx + 1 < len(schedule_df) else None
             if sat_idx is not None:
-                sat_row = schedule_df.iloc[sat_idx]
-                sat_call = sat_row['Call']
-                sat_call_pgy = None
-                if sat_call in residents:
-                    sat_call_pgy = pgy_levels[residents.index(sat_call)]
-                if sat_call in supervisor_names and sat_call_pgy in [3, 4]:
+                sat_call = calls[sat_idx]
+                sat_call_pgy = resident_to_pgy.get(sat_call)
+                if sat_call in supervisor_name_set and sat_call_pgy in [3, 4]:
                     # Check hard/soft constraints for Friday
-                    if date not in hard_lookup[sat_call] and date not in soft_lookup[sat_call]:
-                        schedule_df.at[idx, 'Supervisor'] = sat_call
+                    if sat_call not in hard_blocked_on[date_ord] and sat_call not in soft_blocked_on[date_ord]:
+                        supervisors[idx] = sat_call
                         supervisor_counts[sat_call] += 1
                         prev_supervisor = sat_call
                         prev_call = call
                         continue
             # If not eligible, fall through to normal assignment
         # Build eligible supervisors
-        eligible = [name for name in supervisor_names if name != call and name != prev_call and date not in hard_lookup[name]]
+        eligible = supervisor_name_set - hard_blocked_on[date_ord] - {call, prev_call}
         # Prefer those not violating soft constraints
-        eligible_no_soft = [name for name in eligible if date not in soft_lookup[name]]
+        eligible_no_soft = eligible - soft_blocked_on[date_ord]
         pool = eligible_no_soft if eligible_no_soft else eligible
         if pool:
-            # Sort by fewest supervisor assignments
-            pool.sort(key=lambda n: supervisor_counts[n])
-            chosen = pool[0]
-            schedule_df.at[idx, 'Supervisor'] = chosen
+            # Pick the supervisor with the fewest assignments
+            chosen = min(pool, key=lambda n: (supervisor_counts[n], supervisor_position[n]))
+            supervisors[idx] = chosen
             supervisor_counts[chosen] += 1
             prev_supervisor = chosen
         else:
             prev_supervisor = None
         prev_call = call
+    schedule_df['Supervisor'] = supervisors
     return schedule_df 
\ No newline at end of file
@@ -1,202 +1,231 @@
+import logging
 import pandas as pd
 from datetime import datetime, timedelta
 import calendar
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
+from openpyxl.cell import WriteOnlyCell
 
-def create_calendar_sheet(wb, month_date, schedule_df, rotation_periods=None):
-    print(f"create_calendar_sheet called for {month_date.strftime('%B %Y')}")
-    print(f"schedule_df shape: {schedule_df.shape}")
-    
-    # Create new sheet with month name
+# Calendar columns: each day of the week (Sunday first) gets 2 columns, A-B through M-N
+_DAY_NAMES = ('Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday')
+_WEEKDAY_TO_COL = (1, 3, 5, 7, 9, 11, 13)
+
+# Shared style objects (openpyxl styles are immutable, so one instance can be
+# assigned to any number of cells)
+_BOLD = Font(bold=True)
+_ITALIC = Font(italic=True)
+_ON_CALL_LABEL_FONT = Font(color='FF00B0F0')  # Light blue color, not bold
+_CALL_FONT = Font(bold=True, color='FF00B0F0')  # Light blue and bold
+_SWITCH_FONT = Font(bold=True, color='FFFF0000')  # Bold red text
+_CENTER = Alignment(horizontal='center')
+
+# Colors
+_GRAY_FILL = PatternFill(start_color='FFD9D9D9', end_color='FFD9D9D9', fill_type='solid')     # Light gray
+_GREEN_FILL = PatternFill(start_color='FFE2EFDA', end_color='FFE2EFDA', fill_type='solid')    # Light green
+_YELLOW_FILL = PatternFill(start_color='FFFFF2CC', end_color='FFFFF2CC', fill_type='solid')   # Light yellow
+_SWITCH_FILL = PatternFill(start_color='FFFFFF00', end_color='FFFFFF00', fill_type='solid')   # Yellow background
+
+# Fill for each of the 8 rows in a week: rows 4-5 gray (call/intern),
+# row 7 green (supervisor), row 8 yellow (backup)
+_ROW_FILLS = (None, None, None, _GRAY_FILL, _GRAY_FILL, None, _GREEN_FILL, _YELLOW_FILL)
+# Column O label for each row of a week
+_ROW_LABELS = (None, None, None, "On Call", "Intern", None, "Supervisor", "Backup")
+
+# Borders
+_THIN = Side(style='thin')
+_MEDIUM = Side(style='medium')
+_NO_BORDER = Border()
+_WEEK_SEPARATOR = Border(bottom=_THIN)
+# Border for each (row_offset, col_offset) of the 2x8 day block; the right
+# column gets a medium edge so the vertical line between days stays visible
+_DAY_BLOCK_BORDERS = {
+    (row_offset, col_offset): Border(
+        left=_THIN if col_offset == 0 else None,
+        right=_MEDIUM if col_offset == 1 else None,
+        top=_THIN if row_offset == 0 else None,
+        bottom=_THIN if row_offset == 7 else None
+    )
+    for row_offset in range(8) for col_offset in range(2)
+}
+
+def _header_row(ws, headers):
+    """Build a bold header row that can be passed straight to ws.append"""
+    row = []
+    for header in headers:
+        cell = WriteOnlyCell(ws, value=header)
+        cell.font = _BOLD
+        row.append(cell)
+    return row
+
+def _dates_to_strings(df):
+    """
+    Return df with every date/datetime column formatted as 'YYYY-MM-DD'
+    strings, detecting those columns once instead of probing each value.
+    """
+    date_cols = [
+        col for col in df.columns
+        if pd.api.types.is_datetime64_any_dtype(df[col])
+        or pd.api.types.infer_dtype(df[col], skipna=True) in ('date', 'datetime')
+    ]
+    if not date_cols:
+        return df
+    df = df.copy()
+    for col in date_cols:
+        df[col] = pd.to_datetime(df[col]).dt.strftime('%Y-%m-%d')
+    return df
+
+def _index_by_date(schedule_df):
+    """
+    Map 'YYYY-MM-DD' to that day's schedule record (a plain dict), with
+    Call/Intern/Backup always present so the renderer can index them directly.
+    Supervisor is left absent when the schedule has no supervisor column.
+    """
+    by_date = dict(zip(schedule_df['Date'].dt.strftime('%Y-%m-%d'), schedule_df.to_dict('records')))
+    for record in by_date.values():
+        record.setdefault('Call', '')
+        record.setdefault('Intern', '')
+        record.setdefault('Backup', '')
+    return by_date
+
+def create_calendar_sheet(wb, month_date, schedule_df, rotation_periods=None, ws=None):
+    # Create new sheet with month name, or rename the given (empty) sheet
     month_name = month_date.strftime("%B %Y")
-    ws = wb.create_sheet(title=month_name)
+    logging.debug(f"Creating calendar sheet {month_name} with {len(schedule_df)} schedule rows")
+    if ws is None:
+        ws = wb.create_sheet(title=month_name)
+    else:
+        ws.title = month_name
+
+    # Get first and last day of the month
+    first_of_month = datetime(month_date.year, month_date.month, 1)
+    _, num_days = calendar.monthrange(month_date.year, month_date.month)
+    last_of_month = datetime(month_date.year, month_date.month, num_days)
+
+    # Find the first Sunday before or on the 1st (weekday 6 = Sunday)
+    first_sunday = first_of_month - timedelta(days=(first_of_month.weekday() + 1) % 7)
+    # Find the last Saturday after or on the last day (weekday 5 = Saturday)
+    last_saturday = last_of_month + timedelta(days=(5 - last_of_month.weekday()) % 7)
+
+    # Build list of all days to display
+    all_days = pd.date_range(first_sunday, last_saturday, freq='D')
+
+    # Index the schedule rows by date string once instead of filtering per day
+    by_date = _index_by_date(schedule_df)
     
-    # Write month and year in row 1
-    ws.cell(row=1, column=1, value=month_name)
+    # Rotation switch dates, normalized to date objects for comparison
+    switch_dates = frozenset(
+        rotation['switch_date'].date() if hasattr(rotation['switch_date'], 'date') else rotation['switch_date']
+        for rotation in (rotation_periods or ())
+    )
     
-    # Column mappings for days of week (each day gets 2 columns)
-    day_columns = {
-        'Sunday': ['A', 'B'],
-        'Monday': ['C', 'D'],
-        'Tuesday': ['E', 'F'],
-        'Wednesday': ['G', 'H'],
-        'Thursday': ['I', 'J'],
-        'Friday': ['K', 'L'],
-        'Saturday': ['M', 'N']
-    }
+    _render_calendar(ws, all_days, month_date, by_date, switch_dates)
+    return ws
+
+def _render_calendar(ws, days, current_month, by_date, switch_dates):
+    """
+    Write the month header and the 8-row week blocks for a calendar sheet.
+    days is a DatetimeIndex starting on a Sunday and covering whole weeks;
+    by_date maps 'YYYY-MM-DD' to that day's schedule record.
+    """
+    # Write month and year in row 1
+    ws.cell(row=1, column=1, value=current_month.strftime("%B %Y"))
     
     # Set column widths
-    for col in 'ABCDEFGHIJKLMN':
-        ws.column_dimensions[col].width = 12
+    for col_idx in range(1, 15):  # A through N
+        ws.column_dimensions[get_column_letter(col_idx)].width = 12
     ws.column_dimensions['O'].width = 15
     ws.column_dimensions['P'].width = 5
 
-    # Define border styles
-    thin_border = Side(style='thin')
-    day_border = Border(
-        left=thin_border,
-        right=thin_border,
-        top=thin_border,
-        bottom=thin_border
-    )
-
     # Write day headers in row 2
-    for day, cols in day_columns.items():
-        col_idx = ord(cols[0]) - ord('A') + 1
+    for day, col_idx in zip(_DAY_NAMES, _WEEKDAY_TO_COL):
         for offset in range(2):
             cell = ws.cell(row=2, column=col_idx + offset)
             cell.value = day if offset == 0 else ""
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
+            cell.font = _BOLD
+            cell.alignment = _CENTER
 
-    # Define border styles
-    thin_border = Side(style='thin')
-    
-    # Colors
-    gray_fill = PatternFill(start_color='D9D9D9', end_color='D9D9D9', fill_type='solid')     # Light gray
-    green_fill = PatternFill(start_color='E2EFDA', end_color='E2EFDA', fill_type='solid')    # Light green
-    yellow_fill = PatternFill(start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')   # Light yellow
-    
-    # Get first and last day of the month
-    first_of_month = datetime(month_date.year, month_date.month, 1)
-    _, num_days = calendar.monthrange(month_date.year, month_date.month)
-    last_of_month = datetime(month_date.year, month_date.month, num_days)
-
-    # Find the first Sunday before or on the 1st
-    first_sunday = first_of_month
-    while first_sunday.weekday() != 6:  # 6 = Sunday
-        first_sunday -= timedelta(days=1)
-    # Find the last Saturday after or on the last day
-    last_saturday = last_of_month
-    while last_saturday.weekday() != 5:  # 5 = Saturday
-        last_saturday += timedelta(days=1)
-
-    # Build list of all days to display
-    num_days_display = (last_saturday - first_sunday).days + 1
-    all_days = [first_sunday + timedelta(days=i) for i in range(num_days_display)]
+    # Per-day values for the whole range: day number, overflow flag, date and date string
+    day_values = list(zip(
+        days.day.tolist(),
+        (days.month != current_month.month).tolist(),
+        days.date,
+        days.strftime('%Y-%m-%d'),
+    ))
 
     # Build weeks
-    calendar_weeks = [all_days[i:i+7] for i in range(0, len(all_days), 7)]
+    calendar_weeks = [day_values[i:i+7] for i in range(0, len(day_values), 7)]
 
     # Write calendar
     for week_num, week in enumerate(calendar_weeks):
         base_row = 3 + (week_num * 8)  # Each week takes 8 rows
         
-        # Add week separator border if not first week
-        if week_num > 0:
-            for col in range(1, 16):  # A through O
-                cell = ws.cell(row=base_row - 1, column=col)
-                cell.border = Border(bottom=Side(style='thin'))
-        
-        # Color the rows for each week
-        for col in range(1, 16):  # A through O (including column O)
-            # Rows 4-5 (gray)
-            ws.cell(row=base_row + 3, column=col).fill = gray_fill
-            ws.cell(row=base_row + 4, column=col).fill = gray_fill
-            # Row 7 (green)
-            ws.cell(row=base_row + 6, column=col).fill = green_fill
-            # Row 8 (yellow)
-            ws.cell(row=base_row + 7, column=col).fill = yellow_fill
+        # Get schedule for each day of the week (including overflow days)
+        week_schedules = [by_date.get(date_str) for _, _, _, date_str in week]
         
-        # Add labels in column O for each week
-        on_call_label = ws.cell(row=base_row + 3, column=15, value="On Call")
-        on_call_label.font = Font(color='00B0F0')  # Light blue color, not bold
-        ws.cell(row=base_row + 4, column=15, value="Intern")  # Add intern label
-        ws.cell(row=base_row + 6, column=15, value="Supervisor")  # Supervisor label above backup
-        ws.cell(row=base_row + 7, column=15, value="Backup")
+        # Walk the week's cells once, column by column (A through O), writing the
+        # week separator, row colors, day block borders and column-O labels
+        for col in range(1, 16):
+            day_schedule = week_schedules[(col - 1) // 2] if col < 15 else None
+            col_offset = (col - 1) % 2
+            # Add week separator border if not first week; a scheduled day's block clears it
+            if week_num > 0:
+                ws.cell(row=base_row - 1, column=col).border = _WEEK_SEPARATOR if day_schedule is None else _NO_BORDER
+            for row_offset in range(8):
+                row_fill = _ROW_FILLS[row_offset]
+                if row_fill is None and day_schedule is None:
+                    continue
+                cell = ws.cell(row=base_row + row_offset, column=col)
+                if row_fill is not None:
+                    cell.fill = row_fill
+                if day_schedule is not None:
+                    # Border around the entire 2x8 day block
+                    cell.border = _DAY_BLOCK_BORDERS[(row_offset, col_offset)]
+                if col == 15:
+                    cell.value = _ROW_LABELS[row_offset]
+                    if row_offset == 3:
+                        cell.font = _ON_CALL_LABEL_FONT
         
-        for weekday, date in enumerate(week):
-            cols = list(day_columns.values())[weekday]
-            col_idx = ord(cols[0]) - ord('A') + 1
+        for weekday, (day_number, is_overflow, date, date_str) in enumerate(week):
+            col_idx = _WEEKDAY_TO_COL[weekday]
             # Write day number (only in first column)
             day_cell = ws.cell(row=base_row, column=col_idx)
-            day_cell.value = date.day
-            day_cell.alignment = Alignment(horizontal='center')
+            day_cell.value = day_number
+            day_cell.alignment = _CENTER
             # Italicize if not in current month
-            if date.month != month_date.month:
-                day_cell.font = Font(italic=True)
+            if is_overflow:
+                day_cell.font = _ITALIC
             
             # Check if this date is a rotation switch date
-            if rotation_periods:
-                for rotation in rotation_periods:
-                    # Convert both dates to date objects for comparison
-                    switch_date = rotation['switch_date']
-                    if hasattr(switch_date, 'date'):
-                        switch_date = switch_date.date()
-                    
-                    current_date = date
-                    if hasattr(current_date, 'date'):
-                        current_date = current_date.date()
-                    
-                    if switch_date == current_date:
-                        # Add SWITCH marker in the cell below the date number
-                        switch_cell = ws.cell(row=base_row + 1, column=col_idx)
-                        switch_cell.value = "SWITCH"
-                        switch_cell.font = Font(bold=True, color='FF0000')  # Bold red text
-                        switch_cell.alignment = Alignment(horizontal='center')
-                        switch_cell.fill = PatternFill(start_color='FFFF00', end_color='FFFF00', fill_type='solid')  # Yellow background
-                        break
-            # Get schedule for this day (including overflow days)
-            date_str = date.strftime("%Y-%m-%d")
-            day_schedule = schedule_df[schedule_df['Date'] == date_str]
-            
-            if not day_schedule.empty:
+            if date in switch_dates:
+                # Add SWITCH marker in the cell below the date number
+                switch_cell = ws.cell(row=base_row + 1, column=col_idx)
+                switch_cell.value = "SWITCH"
+                switch_cell.font = _SWITCH_FONT
+                switch_cell.alignment = _CENTER
+                switch_cell.fill = _SWITCH_FILL
+            day_schedule = week_schedules[weekday]
+            if day_schedule is not None:
                 # Write Call person (row 4, first column only)
                 call_cell = ws.cell(row=base_row + 3, column=col_idx)
-                call_cell.value = day_schedule.iloc[0].get('Call', '')
-                call_cell.alignment = Alignment(horizontal='center')
+                call_cell.value = day_schedule['Call']
+                call_cell.alignment = _CENTER
                 # Write Intern person (row 5, first column only)
                 intern_cell = ws.cell(row=base_row + 4, column=col_idx)
-                intern_cell.value = day_schedule.iloc[0].get('Intern', '')
-                intern_cell.alignment = Alignment(horizontal='center')
+                intern_cell.value = day_schedule['Intern']
+                intern_cell.alignment = _CENTER
                 # Write Supervisor (row 7, first column only)
-                if 'Supervisor' in day_schedule.columns:
+                if 'Supervisor' in day_schedule:
                     supervisor_cell = ws.cell(row=base_row + 6, column=col_idx)
-                    supervisor_cell.value = day_schedule.iloc[0].get('Supervisor', '')
-                    supervisor_cell.alignment = Alignment(horizontal='center')
+                    supervisor_cell.value = day_schedule['Supervisor']
+                    supervisor_cell.alignment = _CENTER
                 # Write Backup person (row 8, first column only)
                 backup_cell = ws.cell(row=base_row + 7, column=col_idx)
-                backup_cell.value = day_schedule.iloc[0].get('Backup', '')
-                backup_cell.alignment = Alignment(horizontal='center')
+                backup_cell.value = day_schedule['Backup']
+                backup_cell.alignment = _CENTER
                 
                 # Style the Call person (On Call) in light blue and bold
-                call_cell.font = Font(bold=True, color='00B0F0')  # Light blue and bold
-                
-                # Add borders around the entire 2x8 day block
-                for row_offset in range(8):
-                    for col_offset in range(2):
-                        current_cell = ws.cell(row=base_row + row_offset, column=col_idx + col_offset)
-                        has_left = (col_offset == 0)
-                        has_right = (col_offset == 1)
-                        has_top = (row_offset == 0)
-                        has_bottom = (row_offset == 7)
-                        current_cell.border = Border(
-                            left=thin_border if has_left else None,
-                            right=thin_border if has_right else None,
-                            top=thin_border if has_top else None,
-                            bottom=thin_border if has_bottom else None
-                        )
-                
-                # Ensure the right border of the entire day block is visible on all rows
-                # This fixes the missing vertical borders on the right edge of each day
-                for row_offset in range(8):
-                    rightmost_cell = ws.cell(row=base_row + row_offset, column=col_idx + 1)
-                    current_border = rightmost_cell.border
-                    rightmost_cell.border = Border(
-                        left=current_border.left,
-                        right=Side(style='medium'),  # Make right border more visible
-                        top=current_border.top,
-                        bottom=current_border.bottom
-                    )
-                
-                # Remove any week separator borders that might interfere with day blocks
-                if week_num > 0:
-                    for col_offset in range(2):
-                        separator_cell = ws.cell(row=base_row - 1, column=col_idx + col_offset)
-                        separator_cell.border = Border()
-    return ws
+                call_cell.font = _CALL_FONT
 
 def format_schedule(schedule_df, call_distribution_df=None, golden_weekends_data=None, 
                    soft_constraint_results=None, running_totals_df=None, rotation_periods=None,
@@ -213,9 +242,13 @@ def format_schedule(schedule_df, call_distribution_df=None, golden_weekends_data
         rotation_periods: List of dicts with switch_date and rotation_name for marking switch dates
         call_by_rotation_df: DataFrame with call shift counts by rotation for PGY2/PGY3
     """
-    # Ensure schedule_df has proper date format
+    # Ensure schedule_df has proper date format; ISO strings (date-only or with a
+    # time) take pandas' fast path, anything else falls back to generic parsing
     schedule_df = schedule_df.copy()
-    schedule_df['Date'] = pd.to_datetime(schedule_df['Date'])
+    try:
+        schedule_df['Date'] = pd.to_datetime(schedule_df['Date'], format='ISO8601', cache=True)
+    except ValueError:
+        schedule_df['Date'] = pd.to_datetime(schedule_df['Date'], cache=True)
 
     # Create workbook
     wb = Workbook()
@@ -233,24 +266,24 @@ def format_schedule(schedule_df, call_distribution_df=None, golden_weekends_data
     # Generate all month starts from start month to end month (inclusive)
     months = pd.date_range(start_month_start, end_month_start, freq='MS')
     
+    # Date-indexed, sorted view so each month's rows are a binary-search slice;
+    # the raw schedule sheet below keeps the original row order
+    schedule_by_date = schedule_df.dropna(subset=['Date']).sort_values('Date').set_index('Date', drop=False)
+    
     # Create calendar sheets first (visual formatting)
-    for month in months:
+    for month_idx, month in enumerate(months):
         # Get first and last day of the month
         first_of_month = datetime(month.year, month.month, 1)
         _, num_days = calendar.monthrange(month.year, month.month)
         last_of_month = datetime(month.year, month.month, num_days)
-        # Find the first Sunday before or on the 1st
-        first_sunday = first_of_month
-        while first_sunday.weekday() != 6:  # 6 = Sunday
-            first_sunday -= timedelta(days=1)
-        # Find the last Saturday after or on the last day
-        last_saturday = last_of_month
-        while last_saturday.weekday() != 5:  # 5 = Saturday
-            last_saturday += timedelta(days=1)
+        # Find the first Sunday before or on the 1st (weekday 6 = Sunday)
+        first_sunday = first_of_month - timedelta(days=(first_of_month.weekday() + 1) % 7)
+        # Find the last Saturday after or on the last day (weekday 5 = Saturday)
+        last_saturday = last_of_month + timedelta(days=(5 - last_of_month.weekday()) % 7)
         # Get all assignments for the full calendar grid (including overflow days)
-        mask = (schedule_df['Date'] >= first_sunday) & (schedule_df['Date'] <= last_saturday)
-        month_df = schedule_df[mask]
-        create_calendar_sheet(wb, month, month_df, rotation_periods)
+        month_df = schedule_by_date.loc[first_sunday:last_saturday]
+        # The first month reuses the workbook's default sheet
+        create_calendar_sheet(wb, month, month_df, rotation_periods, ws=wb.active if month_idx == 0 else None)
 
     # Create data sheets (simple data only)
     if call_distribution_df is not None:
@@ -270,9 +303,6 @@ def format_schedule(schedule_df, call_distribution_df=None, golden_weekends_data
     if call_by_rotation_df is not None:
         create_call_by_rotation_sheet(wb, call_by_rotation_df)
 
-    # Remove the default sheet
-    wb.remove(wb['Sheet'])
-    
     return wb
 
 def create_call_distribution_sheet(wb, call_distribution_df):
@@ -280,13 +310,11 @@ def create_call_distribution_sheet(wb, call_distribution_df):
     ws = wb.create_sheet(title="Call Distribution")
     
     # Write headers
-    for col_idx, col_name in enumerate(call_distribution_df.columns, 1):
-        ws.cell(row=1, column=col_idx, value=col_name)
+    ws.append(_header_row(ws, call_distribution_df.columns))
     
     # Write data
-    for row_idx, (_, row) in enumerate(call_distribution_df.iterrows(), 2):
-        for col_idx, value in enumerate(row, 1):
-            ws.cell(row=row_idx, column=col_idx, value=value)
+    for row in call_distribution_df.itertuples(index=False, name=None):
+        ws.append(row)
     
     return ws
 
@@ -297,25 +325,17 @@ def create_golden_weekends_sheet(wb, golden_weekends_data):
     # Check if data is rotation-based (nested dict) or total-based (flat dict)
     if golden_weekends_data and isinstance(list(golden_weekends_data.values())[0], dict):
         # Rotation-based data format
-        ws.cell(row=1, column=1, value="Rotation")
-        ws.cell(row=1, column=2, value="Resident")
-        ws.cell(row=1, column=3, value="Golden Weekends")
+        ws.append(_header_row(ws, ("Rotation", "Resident", "Golden Weekends")))
         
-        row_idx = 2
         for rotation_name, residents_data in golden_weekends_data.items():
             for resident, count in residents_data.items():
-                ws.cell(row=row_idx, column=1, value=rotation_name)
-                ws.cell(row=row_idx, column=2, value=resident)
-                ws.cell(row=row_idx, column=3, value=count)
-                row_idx += 1
+                ws.append((rotation_name, resident, count))
     else:
         # Total-based data format (fallback)
-        ws.cell(row=1, column=1, value="Resident")
-        ws.cell(row=1, column=2, value="Golden Weekends")
+        ws.append(_header_row(ws, ("Resident", "Golden Weekends")))
         
-        for row_idx, (resident, count) in enumerate(golden_weekends_data.items(), 2):
-            ws.cell(row=row_idx, column=1, value=resident)
-            ws.cell(row=row_idx, column=2, value=count)
+        for resident, count in golden_weekends_data.items():
+            ws.append((resident, count))
     
     return ws
 
@@ -323,17 +343,15 @@ def create_raw_schedule_sheet(wb, schedule_df):
     """Create simple raw schedule data sheet"""
     ws = wb.create_sheet(title="Raw Schedule")
     
+    # Convert datetime to string for Excel compatibility
+    schedule_df = _dates_to_strings(schedule_df)
+    
     # Write headers
-    for col_idx, col_name in enumerate(schedule_df.columns, 1):
-        ws.cell(row=1, column=col_idx, value=col_name)
+    ws.append(_header_row(ws, schedule_df.columns))
     
     # Write data
-    for row_idx, (_, row) in enumerate(schedule_df.iterrows(), 2):
-        for col_idx, value in enumerate(row, 1):
-            # Convert datetime to string for Excel compatibility
-            if hasattr(value, 'strftime'):
-                value = value.strftime('%Y-%m-%d')
-            ws.cell(row=row_idx, column=col_idx, value=value)
+    for row in schedule_df.itertuples(index=False, name=None):
+        ws.append(row)
     
     return ws
 
@@ -341,17 +359,15 @@ def create_soft_constraints_sheet(wb, soft_constraint_results):
     """Create simple soft constraints results sheet"""
     ws = wb.create_sheet(title="Soft Constraints")
     
+    # Convert dates to strings for Excel compatibility
+    soft_constraint_results = _dates_to_strings(soft_constraint_results)
+    
     # Write headers
-    for col_idx, col_name in enumerate(soft_constraint_results.columns, 1):
-        ws.cell(row=1, column=col_idx, value=col_name)
+    ws.append(_header_row(ws, soft_constraint_results.columns))
     
     # Write data
-    for row_idx, (_, row) in enumerate(soft_constraint_results.iterrows(), 2):
-        for col_idx, value in enumerate(row, 1):
-            # Convert dates to strings for Excel compatibility
-            if hasattr(value, 'strftime'):
-                value = value.strftime('%Y-%m-%d')
-            ws.cell(row=row_idx, column=col_idx, value=value)
+    for row in soft_constraint_results.itertuples(index=False, name=None):
+        ws.append(row)
     
     return ws
 
@@ -360,13 +376,11 @@ def create_running_totals_sheet(wb, running_totals_df):
     ws = wb.create_sheet(title="Running Totals")
     
     # Write headers
-    for col_idx, col_name in enumerate(running_totals_df.columns, 1):
-        ws.cell(row=1, column=col_idx, value=col_name)
+    ws.append(_header_row(ws, running_totals_df.columns))
     
     # Write data
-    for row_idx, (_, row) in enumerate(running_totals_df.iterrows(), 2):
-        for col_idx, value in enumerate(row, 1):
-            ws.cell(row=row_idx, column=col_idx, value=value)
+    for row in running_totals_df.itertuples(index=False, name=None):
+        ws.append(row)
     
     return ws
 
@@ -375,223 +389,11 @@ def create_call_by_rotation_sheet(wb, call_by_rotation_df):
     ws = wb.create_sheet(title="Call by Rotation")
     
     # Write headers
-    for col_idx, col_name in enumerate(call_by_rotation_df.columns, 1):
-        ws.cell(row=1, column=col_idx, value=col_name)
+    ws.append(_header_row(ws, call_by_rotation_df.columns))
     
     # Write data
-    for row_idx, (_, row) in enumerate(call_by_rotation_df.iterrows(), 2):
-        for col_idx, value in enumerate(row, 1):
-            ws.cell(row=row_idx, column=col_idx, value=value)
-    
-    return ws
-
-def create_merged_calendar_sheet(wb, prev_month, current_month, schedule_df):
-    """Create a calendar sheet that includes the last week of previous month and current month"""
-    # Use current month for sheet name
-    month_name = current_month.strftime("%B %Y")
-    ws = wb.create_sheet(title=month_name)
-    
-    # Write month and year in row 1
-    ws.cell(row=1, column=1, value=month_name)
-    
-    # Column mappings for days of week (each day gets 2 columns)
-    day_columns = {
-        'Sunday': ['A', 'B'],
-        'Monday': ['C', 'D'],
-        'Tuesday': ['E', 'F'],
-        'Wednesday': ['G', 'H'],
-        'Thursday': ['I', 'J'],
-        'Friday': ['K', 'L'],
-        'Saturday': ['M', 'N']
-    }
-    
-    # Set column widths
-    for col in 'ABCDEFGHIJKLMN':
-        ws.column_dimensions[col].width = 12
-    ws.column_dimensions['O'].width = 15
-    ws.column_dimensions['P'].width = 5
-
-    # Define border styles
-    thin_border = Side(style='thin')
-    
-    # Write day headers in row 2
-    for day, cols in day_columns.items():
-        col_idx = ord(cols[0]) - ord('A') + 1
-        for offset in range(2):
-            cell = ws.cell(row=2, column=col_idx + offset)
-            cell.value = day if offset == 0 else ""
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal='center')
-
-    # Colors
-    gray_fill = PatternFill(start_color='D9D9D9', end_color='D9D9D9', fill_type='solid')
-    green_fill = PatternFill(start_color='E2EFDA', end_color='E2EFDA', fill_type='solid')
-    yellow_fill = PatternFill(start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
-    
-    # Get the earliest date in the schedule
-    start_date = schedule_df['Date'].min()
-    
-    # Calculate the first Sunday of our calendar view
-    first_sunday = start_date - pd.Timedelta(days=start_date.weekday() + 1)
-    if first_sunday.month != start_date.month:
-        first_sunday = start_date - pd.Timedelta(days=start_date.weekday())
-    
-    # Get number of days to show
-    last_date = schedule_df['Date'].max()
-    num_days = (last_date - first_sunday).days + 1
-    
-    # Calculate calendar weeks
-    current_week = []
-    calendar_weeks = []
-    current_date = first_sunday
-    
-    for _ in range(num_days):
-        current_week.append(current_date)
-        if len(current_week) == 7:
-            calendar_weeks.append(current_week)
-            current_week = []
-        current_date += pd.Timedelta(days=1)
-    
-    # Add remaining days if any
-    if current_week:
-        while len(current_week) < 7:
-            current_week.append(current_date)
-            current_date += pd.Timedelta(days=1)
-        calendar_weeks.append(current_week)
-    
-    # Write calendar
-    for week_num, week in enumerate(calendar_weeks):
-        base_row = 3 + (week_num * 8)  # Each week takes 8 rows
-        
-        # Add week separator border if not first week
-        if week_num > 0:
-            for col in range(1, 16):  # A through O
-                cell = ws.cell(row=base_row - 1, column=col)
-                cell.border = Border(bottom=Side(style='thin'))
-        
-        # Color the rows for each week
-        for col in range(1, 16):  # A through O (including column O)
-            # Rows 4-5 (gray)
-            ws.cell(row=base_row + 3, column=col).fill = gray_fill
-            ws.cell(row=base_row + 4, column=col).fill = gray_fill
-            
-            # Row 7 (green)
-            ws.cell(row=base_row + 6, column=col).fill = green_fill
-            
-            # Row 8 (yellow)
-            ws.cell(row=base_row + 7, column=col).fill = yellow_fill
-        
-        # Add labels in column O for each week
-        on_call_label = ws.cell(row=base_row + 3, column=15, value="On Call")
-        on_call_label.font = Font(color='00B0F0')  # Light blue color, not bold
-        ws.cell(row=base_row + 4, column=15, value="Intern")
-        ws.cell(row=base_row + 6, column=15, value="Supervisor")
-        ws.cell(row=base_row + 7, column=15, value="Backup")
-        
-        for weekday, date in enumerate(week):
-            print(f"Processing date: {date.strftime('%Y-%m-%d')}")
-            # Get the starting column for this day
-            cols = list(day_columns.values())[weekday]
-            col_idx = ord(cols[0]) - ord('A') + 1
-            
-
-            
-            # Write day number (only in first column)
-            day_cell = ws.cell(row=base_row, column=col_idx)
-            day_cell.value = date.day
-            day_cell.alignment = Alignment(horizontal='center')
-            
-            # Style differently if from previous month
-            if date.month != current_month.month:
-                day_cell.font = Font(italic=True, color='808080')
-            
-            # Get schedule for this day
-            date_str = date.strftime("%Y-%m-%d")
-            day_schedule = schedule_df[schedule_df['Date'] == date_str]
-            
-            # Debug: Print what we found for this date
-            if not day_schedule.empty:
-                print(f"Date {date_str}: Found {len(day_schedule)} rows")
-                print(f"Columns: {list(day_schedule.columns)}")
-                print(f"First row data: {day_schedule.iloc[0].to_dict()}")
-            else:
-                print(f"Date {date_str}: No schedule data found")
-            
-            if not day_schedule.empty:
-                # Write Call person (row 4, first column only)
-                call_cell = ws.cell(row=base_row + 3, column=col_idx)
-                call_cell.value = day_schedule.iloc[0]['Call']
-                call_cell.alignment = Alignment(horizontal='center')
-                
-                # Write Intern person (row 5, first column only)
-                intern_cell = ws.cell(row=base_row + 4, column=col_idx)
-                intern_cell.value = day_schedule.iloc[0]['Intern']
-                intern_cell.alignment = Alignment(horizontal='center')
-                
-                # Write Supervisor (row 7, first column only)
-                if 'Supervisor' in day_schedule.columns:
-                    supervisor_cell = ws.cell(row=base_row + 6, column=col_idx)
-                    supervisor_cell.value = day_schedule.iloc[0]['Supervisor']
-                    supervisor_cell.alignment = Alignment(horizontal='center')
-                
-                # Write Backup person (row 8, first column only)
-                backup_cell = ws.cell(row=base_row + 7, column=col_idx)
-                backup_cell.value = day_schedule.iloc[0]['Backup']
-                backup_cell.alignment = Alignment(horizontal='center')
-                
-                # Style the Call person (On Call) in light blue and bold
-                call_cell.font = Font(bold=True, color='00B0F0')  # Light blue and bold
-                
-                # Add borders around the entire 2x8 day block
-                for row_offset in range(8):
-                    for col_offset in range(2):
-                        current_cell = ws.cell(row=base_row + row_offset, column=col_idx + col_offset)
-                        
-                        # Determine which borders this cell should have
-                        has_left = (col_offset == 0)  # Left border for first column of day
-                        has_right = (col_offset == 1)  # Right border for second column of day
-                        has_top = (row_offset == 0)   # Top border for first row of day
-                        has_bottom = (row_offset == 7) # Bottom border for last row of day
-                        
-                        # Create border object with all required sides
-                        current_cell.border = Border(
-                            left=thin_border if has_left else None,
-                            right=thin_border if has_right else None,
-                            top=thin_border if has_top else None,
-                            bottom=thin_border if has_bottom else None
-                        )
-                        
-                        # Ensure the last row has a more visible bottom border
-                        if row_offset == 7:  # Last row of the day
-                            current_cell.border = Border(
-                                left=current_cell.border.left,
-                                right=current_cell.border.right,
-                                top=current_cell.border.top,
-                                bottom=Side(style='medium')  # Make bottom border more visible
-                            )
-                            
-                            # Set row height to ensure bottom border is visible
-                            ws.row_dimensions[base_row + row_offset].height = 20
-            
-            # Ensure the right border of the entire day block is visible on all rows
-            # This fixes the missing vertical borders on the right edge of each day
-            for row_offset in range(8):
-                rightmost_cell = ws.cell(row=base_row + row_offset, column=col_idx + 1)
-                current_border = rightmost_cell.border
-                rightmost_cell.border = Border(
-                    left=current_border.left,
-                    right=Side(style='medium'),  # Make right border more visible
-                    top=current_border.top,
-                    bottom=current_border.bottom
-                )
-            
-            # Remove any week separator borders that might interfere with day blocks
-            if week_num > 0:
-                for col_offset in range(2):
-                    separator_cell = ws.cell(row=base_row - 1, column=col_idx + col_offset)
-                    separator_cell.border = Border()
-                    
-
+    for row in call_by_rotation_df.itertuples(index=False, name=None):
+        ws.append(row)
     
     return ws
 